@@ -0,0 +1,66 @@
+"""Checks that importing tikzpaint stays fast and does not import matplotlib
+
+Every import is timed in a fresh interpreter, and the best of a few runs is compared against the budget.
+Exits with a non-zero status if the budget is exceeded or if matplotlib was imported
+
+Usage:
+    python benchmarks/bench_import.py --budget 0.5"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = ("tikzpaint", "tikzpaint.figures", "tikzpaint.shapes")
+
+# Runs in the fresh interpreter: imports the module and reports the time and whether matplotlib came along
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"time": elapsed, "matplotlib": sorted(m for m in sys.modules if m == "matplotlib" or m.startswith("matplotlib."))[:5]}}))
+"""
+
+def measure(module: str, repeat: int) -> tuple[float, list[str]]:
+    """Returns the best import time of the module in seconds, and the matplotlib modules it imported. 
+    Raises ImportError with the error output of the interpreter if the import fails"""
+    best = float("inf")
+    loaded: list[str] = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _SCRIPT.format(module = module)], capture_output = True, text = True)
+        if out.returncode != 0:
+            raise ImportError(out.stderr.strip() or f"the interpreter exited with status {out.returncode}")
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        best = min(best, result["time"])
+        loaded = result["matplotlib"]
+    return best, loaded
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description = "Checks the import time of tikzpaint against a budget")
+    parser.add_argument("--modules", nargs = "+", default = list(MODULES), help = "the modules to import")
+    parser.add_argument("--budget", type = float, default = 0.5, help = "the largest import time allowed for every module, in seconds")
+    parser.add_argument("--repeat", type = int, default = 5, help = "the number of fresh interpreters per module. The best time is kept")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for module in args.modules:
+        try:
+            elapsed, loaded = measure(module, args.repeat)
+        except ImportError as e:
+            ok = False
+            print(f"{module}: import failed\n{e}")
+            continue
+        problems = []
+        if elapsed > args.budget:
+            problems.append(f"over the budget of {args.budget * 1000:.0f} ms")
+        if loaded:
+            problems.append(f"imports matplotlib ({', '.join(loaded)})")
+        ok = ok and not problems
+        print(f"{module}: {elapsed * 1000:.1f} ms" + (f" - {'; '.join(problems)}" if problems else ""))
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
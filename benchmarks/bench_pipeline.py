@@ -0,0 +1,197 @@
+"""Benchmarks the draw -> preprocess -> emit pipeline of tikzpaint
+
+Every scene is made of curves on the unit sphere with a given total number of vertices, in 2, 3 or n dimensions,
+rendered with no projection, a linear projection or a stereographic projection. For every scene the time and the peak memory
+of every stage is recorded. The results can be saved as a baseline and later runs can be compared against it
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 10 1000 100000 --save baseline.json
+    python benchmarks/bench_pipeline.py --sizes 10 1000 100000 --compare baseline.json"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import numpy as np
+
+from tikzpaint.figures import Figure, Projection, LinearProjection, StereographicProjection, Rasterizer
+from tikzpaint.shapes import Line, ParametricCurve
+
+STAGES = ("line", "draw", "project", "preprocess", "tikzify", "plot")
+SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+PROJECTIONS = ("none", "linear", "stereographic")
+
+# The number of vertices of every curve in a scene, except for scenes with fewer vertices than this
+CURVE_VERTICES = 1000
+
+# Returned by make_projection for combinations of projection and dimension that are not benchmarked
+_SKIP: Any = object()
+
+def make_projection(kind: str, ndims: int) -> Projection | None:
+    """Returns the projection from ndims dimensions to the plane, or None if the combination does not make sense"""
+    rng = np.random.default_rng(0)
+    if kind == "none":
+        return None if ndims == 2 else _SKIP
+    if kind == "linear":
+        return LinearProjection(rng.standard_normal((2, ndims)))
+    if kind == "stereographic":
+        if ndims < 3:
+            return _SKIP
+        stereo = StereographicProjection(ndims)
+        if ndims == 3:
+            return stereo
+        return stereo.combine(LinearProjection(rng.standard_normal((2, ndims - 1))))
+    raise ValueError(f"Unknown projection {kind}")
+
+def make_scene(size: int, ndims: int) -> list[ParametricCurve]:
+    """Returns great circle arcs on the unit sphere with size vertices in total"""
+    rng = np.random.default_rng(1)
+    curves = []
+    remaining = size
+    while remaining > 0:
+        n = min(remaining, CURVE_VERTICES)
+        remaining -= n
+
+        # Two orthonormal directions span the plane of the great circle
+        a, b = np.linalg.qr(rng.standard_normal((ndims, 2)))[0].T
+        def f(t, a = a, b = b):
+            return np.outer(np.cos(t), a) + np.outer(np.sin(t), b)
+        curves.append(ParametricCurve(f, 0, 3, resolution = max(n - 1, 1)))
+    return curves
+
+def make_lines(size: int, ndims: int) -> list[Line]:
+    """Returns lines with size vertices in total, sampled with Line.gen_coords"""
+    rng = np.random.default_rng(2)
+    lines = []
+    remaining = size
+    while remaining > 0:
+        n = min(remaining, CURVE_VERTICES)
+        remaining -= n
+        start, end = rng.standard_normal((2, ndims))
+        lines.append(Line(start, end, resolution = max(n - 1, 1), adaptive = False))
+    return lines
+
+def make_figure(size: int, ndims: int) -> Figure:
+    fig = Figure(ndims)
+    fig.draw(*make_scene(size, ndims))
+    return fig
+
+def measure(setup: Callable[[], Any], stage: Callable[[Any], Any], repeat: int) -> dict[str, float]:
+    """Runs the stage on a fresh setup every time, and returns the best time in seconds and the peak memory in bytes.
+    Memory is measured in a separate run so that tracing does not slow down the timings"""
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        stage(state)
+        best = min(best, time.perf_counter() - start)
+
+    state = setup()
+    tracemalloc.start()
+    try:
+        stage(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": best, "peak": float(peak)}
+
+def bench_case(size: int, ndims: int, projection: Projection | None, stages: tuple[str, ...], repeat: int,
+               rasterizer: Rasterizer | None) -> dict[str, dict[str, float]]:
+    kwargs: dict[str, Any] = {"projection": projection}
+    results: dict[str, dict[str, float]] = {}
+
+    if "line" in stages:
+        results["line"] = measure(lambda: Figure(ndims), lambda fig: fig.draw(*make_lines(size, ndims)), repeat)
+    if "draw" in stages:
+        results["draw"] = measure(lambda: Figure(ndims), lambda fig: fig.draw(*make_scene(size, ndims)), repeat)
+    if "project" in stages and projection is not None:
+        points = np.concatenate([d.coordinates for d in make_figure(size, ndims).toDraw])
+        compiled = projection.compile()
+        results["project"] = measure(lambda: points, compiled.batch, repeat)
+    if "preprocess" in stages:
+        results["preprocess"] = measure(lambda: make_figure(size, ndims), lambda fig: list(fig.preprocess(kwargs)), repeat)
+    if "tikzify" in stages:
+        results["tikzify"] = measure(lambda: make_figure(size, ndims), lambda fig: fig.tikzify(False, **kwargs), repeat)
+    if "plot" in stages and rasterizer is not None:
+        results["plot"] = measure(lambda: make_figure(size, ndims), lambda fig: rasterizer.render(fig, **kwargs), repeat)
+    return results
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    stages = tuple(args.stages)
+    rasterizer = Rasterizer() if "plot" in stages else None
+    results: dict[str, Any] = {}
+    for size in args.sizes:
+        for ndims in args.dims:
+            drawn = False
+            for kind in args.projections:
+                projection = make_projection(kind, ndims)
+                if projection is _SKIP:
+                    continue
+
+                # Drawing is the same for every projection
+                case_stages = stages if not drawn else tuple(s for s in stages if s not in ("line", "draw"))
+                drawn = True
+
+                key = f"{size}-{ndims}d-{kind}"
+                results[key] = bench_case(size, ndims, projection, case_stages, args.repeat, rasterizer)
+                print(key, " ".join(f"{stage}={r['time'] * 1000:.2f}ms/{r['peak'] / 1024:.0f}KiB" for stage, r in results[key].items()), flush = True)
+    if rasterizer is not None:
+        rasterizer.close()
+    return results
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> bool:
+    """Prints the ratio of every measurement against the baseline. Returns true if nothing regressed beyond the threshold"""
+    ok = True
+    for key, stages in results.items():
+        for stage, r in stages.items():
+            base = baseline.get(key, {}).get(stage)
+            if base is None:
+                continue
+            for metric in ("time", "peak"):
+                if base[metric] <= 0:
+                    continue
+                ratio = r[metric] / base[metric]
+                regressed = ratio > threshold
+                ok = ok and not regressed
+                if regressed or ratio < 1 / threshold:
+                    print(f"{'REGRESSION' if regressed else 'improvement'} {key} {stage} {metric}: {ratio:.2f}x "
+                          f"({base[metric]:.4g} -> {r[metric]:.4g})")
+    return ok
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description = "Benchmarks the tikzpaint rendering pipeline")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = list(SIZES), help = "total number of vertices of the scenes")
+    parser.add_argument("--ndims", type = int, default = 5, help = "the number of dimensions of the n-D scenes")
+    parser.add_argument("--dims", type = int, nargs = "+", default = None, help = "the dimensions of the scenes. Defaults to 2, 3 and ndims")
+    parser.add_argument("--projections", nargs = "+", choices = PROJECTIONS, default = list(PROJECTIONS))
+    parser.add_argument("--stages", nargs = "+", choices = STAGES, default = list(STAGES))
+    parser.add_argument("--repeat", type = int, default = 3, help = "the number of timed runs per stage. The best one is kept")
+    parser.add_argument("--save", help = "save the results as a baseline to this JSON file")
+    parser.add_argument("--compare", help = "compare the results against the baseline in this JSON file")
+    parser.add_argument("--threshold", type = float, default = 1.25, help = "the ratio to the baseline above which a measurement counts as a regression")
+    args = parser.parse_args(argv)
+    if args.dims is None:
+        args.dims = [2, 3, args.ndims]
+
+    results = run(args)
+
+    ok = True
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        ok = compare(results, baseline["results"], args.threshold)
+
+    if args.save:
+        meta = {"python": sys.version, "platform": platform.platform(), "numpy": np.__version__}
+        with open(args.save, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent = 2)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Checks the path simplification kernels against the drawings they are meant to preserve
+
+Every check simplifies a path and measures how far the original vertices are from the simplified path. 
+Removing duplicate and collinear vertices must not move the drawing at all (up to rounding), 
+and Ramer-Douglas-Peucker must stay within its tolerance. Exits with a non-zero status if any check fails
+
+Usage:
+    python benchmarks/check_geometry.py"""
+
+from __future__ import annotations
+
+import sys
+from typing import Callable
+
+import numpy as np
+
+from tikzpaint.figures import Figure
+from tikzpaint.shapes import ParametricCurve
+from tikzpaint.util import NDArray, remove_duplicates, remove_collinear, simplify_rdp, simplify_path, round_array
+
+def deviation(original: NDArray[np.float64], simplified: NDArray[np.float64]) -> float:
+    """The largest distance between a vertex of the original path and the segment of the simplified path that replaces it. 
+    The simplified path must be made of vertices of the original path, in order"""
+    rows = original.tolist()
+    kept: list[int] = []
+    position = 0
+    for vertex in simplified.tolist():
+        while rows[position] != vertex:
+            position += 1
+        kept.append(position)
+    if len(kept) == 1:
+        return float(np.max(np.linalg.norm(original - simplified[0], axis = 1)))
+    
+    # Every original vertex is compared with the segment between the kept vertices around it
+    segment = np.clip(np.searchsorted(kept, np.arange(len(rows)), side = "right") - 1, 0, len(kept) - 2)
+    a, b = simplified[segment], simplified[segment + 1]
+    ab = b - a
+    length = np.maximum(np.sum(ab * ab, axis = 1), 1e-300)
+    t = np.clip(np.sum((original - a) * ab, axis = 1) / length, 0, 1)
+    return float(np.max(np.linalg.norm(original - a - t[:, None] * ab, axis = 1)))
+
+def semicircle(n: int, radius: float = 1.) -> NDArray[np.float64]:
+    t = np.linspace(0, np.pi, n)
+    return np.stack([radius * np.cos(t), radius * np.sin(t)], axis = -1)
+
+def check_duplicates() -> None:
+    path = np.array([[0., 0.], [0., 0.], [1., 0.], [1., 0.], [1., 1.]])
+    result = remove_duplicates(path)
+    assert result.shape[0] == 3, result
+    assert deviation(path, result) == 0
+
+def check_collinear_exact() -> None:
+    path = np.array([[0., 0.], [1., 0.], [2., 0.], [2., 1.], [2., 0.5]])
+    result = remove_collinear(path)
+    assert result.tolist() == [[0., 0.], [2., 0.], [2., 1.], [2., 0.5]], result
+
+def check_collinear_fine_curve() -> None:
+    # Every vertex of a finely sampled curve is nearly collinear with its neighbours, but the curve must not collapse
+    for n in (1001, 20001, 200001):
+        path = semicircle(n)
+        result = remove_collinear(path)
+        assert deviation(path, result) < 1e-9, (n, result.shape)
+
+        rounded = round_array(path, 2)
+        result = remove_collinear(rounded, 2)
+        assert deviation(rounded, result) < 1e-9, (n, result.shape)
+
+def check_rdp() -> None:
+    for n in (101, 20001):
+        for tolerance in (1e-3, 1e-2, 0.1):
+            path = semicircle(n)
+            result = simplify_rdp(path, tolerance)
+            assert deviation(path, result) <= tolerance + 1e-12, (n, tolerance)
+            assert result.shape[0] >= 3
+
+def check_simplify_path() -> None:
+    path = round_array(semicircle(20001), 2)
+    result = simplify_path(path, 0, 2)
+    assert deviation(path, result) < 1e-9
+    result = simplify_path(path, 0.01, 2)
+    assert deviation(path, result) <= 0.01 + 1e-12
+
+def check_figure() -> None:
+    # The end to end case: a fine curve rendered with simplification must still be a semicircle
+    fig = Figure()
+    fig.draw(ParametricCurve(lambda t: (np.cos(t), np.sin(t)), 0, np.pi, 20000))
+    for simplify in (True, 0.01):
+        simplified = list(fig.preprocess({"simplify": simplify}))[0].coordinates
+        original = list(fig.preprocess({}))[0].coordinates
+        assert deviation(original, simplified) <= (0.01 if simplify is not True else 0) + 1e-9, (simplify, simplified.shape)
+    assert fig.tikzify(False, simplify = None) == fig.tikzify(False)
+
+CHECKS: list[Callable[[], None]] = [check_duplicates, check_collinear_exact, check_collinear_fine_curve, check_rdp, check_simplify_path, check_figure]
+
+def main() -> int:
+    ok = True
+    for check in CHECKS:
+        try:
+            check()
+            print(f"{check.__name__}: ok")
+        except AssertionError as e:
+            ok = False
+            print(f"{check.__name__}: FAILED {e}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,11 @@
 from tikzpaint.figures.drawable import Drawable
 from tikzpaint.figures.displayable import Displayable
+from tikzpaint.figures.spatial import GridIndex
+from tikzpaint.figures.stats import RenderStats
 from tikzpaint.figures.figure import Figure
-from tikzpaint.figures.projection import Projection, LinearProjection, StereographicProjection
-from tikzpaint.figures.options import PlotOptions
+from tikzpaint.figures.projection import Projection, LinearProjection, StereographicProjection, ProjectionPipeline
+from tikzpaint.figures.options import PlotOptions, DEFAULT_OPTIONS
+from tikzpaint.figures.raster import Rasterizer
+from tikzpaint.figures.serialize import FigurePack, pack_figure, unpack_figure, save_pack, load_pack, save_figure, load_figure
+from tikzpaint.figures.batch import BatchResult, render_batch
+from tikzpaint.figures.animation import Animation
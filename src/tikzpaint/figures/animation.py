@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Any, Generator, Sequence, TextIO
+import io
+import numpy as np
+
+from tikzpaint.util import NDArray, round_array
+from tikzpaint.figures.displayable import Displayable
+from tikzpaint.figures.figure import Figure, write_chunks
+from tikzpaint.figures.options import PlotOptions
+from tikzpaint.figures.projection import Projection
+from tikzpaint.figures.raster import Rasterizer
+from tikzpaint.figures.serialize import pack_figure
+
+class Animation:
+    """A sequence of frames, where every frame shows the same figure under a different projection. 
+    The source geometry is gathered once, and the matplotlib artists are created on the first frame and then moved in place, 
+    so every frame only costs a projection and a redraw
+    
+    - fig: the figure to animate. Later changes to the figure are not picked up by the animation
+    - projections: one projection per frame, each from the dimensions of the figure to 2 dimensions
+    - rasterizer: the rasterizer used to render the frames. The animation keeps its artists on the rasterizer, so do not render other figures with it in between frames
+    - bound: float = if -1, then the view follows the geometry of every frame, otherwise we restrict our view to (-a, a) on both x and y axis
+    - round: bool = if set to false, then we will skip the rounding step. Coordinates are rounded to the decimals of the figure"""
+    def __init__(self, fig: Figure, projections: Sequence[Projection], rasterizer: Rasterizer | None = None, bound: float = -1, round: bool = True) -> None:
+        self.projections = [p.compile() for p in projections]
+        for i, proj in enumerate(self.projections):
+            if not proj.result_dims == 2:
+                raise ValueError(f"Output of projection dimensions must be 2, recieved {proj.result_dims} instead in frame {i}")
+            if not proj.input_dims == fig.ndims:
+                raise ValueError(f"Input of projection dimensions must be {fig.ndims}, recieved {proj.input_dims} instead in frame {i}")
+        
+        self.rasterizer = rasterizer if rasterizer is not None else Rasterizer()
+        self.bound = bound
+        self.round = round
+        self.decimals = fig.decimals
+
+        # Every frame has its own projection, so drawables are expanded without assuming one
+        displayables = fig.displayables({"projection": None}, readapt = True)
+        pack = pack_figure(fig, displayables = displayables)
+        self.coordinates = pack.coordinates
+        self.offsets = pack.offsets
+        self.displayables = list(displayables)
+
+        groups: dict[tuple[type[Displayable], PlotOptions], list[int]] = {}
+        for i, d in enumerate(self.displayables):
+            groups.setdefault((type(d), d.options), []).append(i)
+        self._groups = list(groups.items())
+        self._artists: list[Any] | None = None
+    
+    def __len__(self) -> int:
+        return len(self.projections)
+    
+    def project(self, frame: int) -> list[NDArray[np.float64]]:
+        """Returns the projected coordinates of every displayable in the frame"""
+        coords = self.projections[frame].batch(self.coordinates)
+        if self.round:
+            coords = round_array(coords, self.decimals)
+        return np.split(coords, self.offsets[1:-1])
+    
+    def render(self, frame: int, out: NDArray[np.uint8] | None = None) -> NDArray[np.uint8]:
+        """Renders one frame and returns the RGBA image. See Rasterizer.render for the meaning of out"""
+        coords = self.project(frame)
+
+        if self._artists is None or not all(cls.update_batch(artist, [coords[i] for i in indices]) 
+                                            for ((cls, _), indices), artist in zip(self._groups, self._artists)):
+            # Build the artists from scratch. This only happens on the first frame, unless some displayable cannot update its artist in place
+            ax = self.rasterizer.reset()
+            self._artists = [cls.plot_batch(ax, [self.displayables[i].with_coordinates(coords[i]) for i in indices], options) 
+                             for (cls, options), indices in self._groups]
+        
+        ax = self.rasterizer.ax
+        if self.bound >= 0:
+            ax.set_xbound(-self.bound, self.bound)
+            ax.set_ybound(-self.bound, self.bound)
+        elif self.coordinates.shape[0] > 0:
+            flat = np.concatenate(coords)
+            (xmin, ymin), (xmax, ymax) = flat.min(axis = 0), flat.max(axis = 0)
+            dx, dy = max(xmax - xmin, 1e-9) * 0.05, max(ymax - ymin, 1e-9) * 0.05
+            ax.set_xlim(xmin - dx, xmax + dx)
+            ax.set_ylim(ymin - dy, ymax + dy)
+        
+        return self.rasterizer.capture(out)
+    
+    def frames(self, out: NDArray[np.uint8] | None = None) -> Generator[NDArray[np.uint8], None, None]:
+        """Yields the RGBA image of every frame. Without out, every image is a view that is overwritten by the next frame"""
+        for i in range(len(self)):
+            yield self.render(i, out)
+    
+    def iter_tikz(self, indentation: int = 4, scale: float = 0.7) -> Generator[str, None, None]:
+        """Yields the tikz code of a single picture where every frame is wrapped in a beamer overlay \\only<k>{...}"""
+        if scale <= 0:
+            raise ValueError(f"Scale must be greater or equal to 0, recieved {scale}")
+        
+        yield f"\\begin{{tikzpicture}}[scale={scale}]\n"
+        for i in range(len(self)):
+            coords = self.project(i)
+            yield " " * indentation + f"\\only<{i + 1}>{{\n"
+            for d, c in zip(self.displayables, coords):
+                yield " " * indentation * 2 + d.with_coordinates(c).tikzify(self.decimals if self.round else None) + "\n"
+            yield " " * indentation + "}\n"
+        yield "\\end{tikzpicture}"
+    
+    def write_tikz(self, file: str | TextIO, indentation: int = 4, scale: float = 0.7, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> None:
+        """Writes the beamer overlays to a path or file-like object, one frame at a time"""
+        write_chunks(file, self.iter_tikz(indentation, scale), buffer_size)
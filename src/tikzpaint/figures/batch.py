@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Sequence
+import traceback
+import numpy as np
+
+from tikzpaint.util import NDArray
+from tikzpaint.figures.figure import Figure
+from tikzpaint.figures.raster import Rasterizer
+from tikzpaint.figures.serialize import FigurePack, pack_figure, unpack_figure
+
+@dataclass
+class BatchResult:
+    """The output of one figure in a batch render
+    
+    - index: the position of the figure in the batch
+    - tikz: the tikz code, if requested
+    - image: the (height, width, 4) RGBA image, if requested
+    - error: the formatted traceback if rendering the figure failed, otherwise None"""
+    index: int
+    tikz: str | None = None
+    image: NDArray[np.uint8] | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class _Job:
+    index: int
+    pack: FigurePack
+    tikz: bool
+    png: bool
+    size: tuple[int, int, float]
+    kwargs: dict[str, Any]
+
+# Every worker process keeps one rasterizer per image size, so the matplotlib figure is reused across jobs
+_rasterizers: dict[tuple[int, int, float], Rasterizer] = {}
+
+def _run(job: _Job) -> BatchResult:
+    result = BatchResult(job.index)
+    try:
+        fig = unpack_figure(job.pack)
+        if job.tikz:
+            result.tikz = fig.tikzify(output = False, **job.kwargs)
+        if job.png:
+            if job.size not in _rasterizers:
+                _rasterizers[job.size] = Rasterizer(*job.size)
+            result.image = _rasterizers[job.size].render(fig, out = np.empty(_rasterizers[job.size].shape, dtype = np.uint8), **job.kwargs)
+    except Exception:
+        result.error = traceback.format_exc()
+    return result
+
+def render_batch(figures: Sequence[Figure], tikz: bool = True, png: bool = False, processes: int | None = None, 
+                 width: int = 640, height: int = 480, dpi: float = 100, chunksize: int = 1, **kwargs) -> list[BatchResult]:
+    """Renders many independent figures across a pool of processes. 
+    The figures are sent to the workers as FigurePacks instead of pickled object graphs
+
+    - tikz: bool = if set to true, then the tikz code of every figure is returned
+    - png: bool = if set to true, then the rasterized image of every figure is returned
+    - processes: the number of worker processes, defaults to the number of cores. If set to 0, then everything runs in this process
+    - width, height, dpi: the size of the rasterized images
+    - chunksize: the number of figures sent to a worker at a time
+    - kwargs: the keyword arguments passed to every tikzify and render call, such as projection
+    
+    Returns one result per figure, in the same order as the figures. Errors are reported per figure instead of being raised"""
+    # Lazy drawables are expanded while packing, which happens here since drawables are not sent to the workers. 
+    # A figure that fails to pack gets its error right away and is not sent either
+    results: list[BatchResult | None] = [None] * len(figures)
+    jobs: list[_Job] = []
+    for i, fig in enumerate(figures):
+        try:
+            jobs.append(_Job(i, pack_figure(fig, kwargs), tikz, png, (width, height, dpi), kwargs))
+        except Exception:
+            results[i] = BatchResult(i, error = traceback.format_exc())
+
+    if processes == 0 or not jobs:
+        done = [_run(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers = processes) as executor:
+            done = list(executor.map(_run, jobs, chunksize = chunksize))
+    
+    for result in done:
+        results[result.index] = result
+    return results #type: ignore
@@ -1,17 +1,28 @@
+from __future__ import annotations
+
 from abc import ABC
 from abc import abstractmethod as virtual
 import numpy as np
-from typing import Any, ParamSpec, Callable
-from tikzpaint.util import Coordinates, copy
-from tikzpaint.figures.options import PlotOptions
-from matplotlib.axes import Axes
+from typing import Any, ParamSpec, Callable, TYPE_CHECKING
+from functools import cache
+from tikzpaint.util import NDArray, DECIMALS, copy, freeze
+from tikzpaint.figures.options import PlotOptions, DEFAULT_OPTIONS
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
 
 
 # Displayable are objects that can be directly displayed on the figure
 class Displayable:
     """Base class for any object that could be displayed in the figure
     Displayables are the layer 0 interaction between external libraries (such as matplotlib or tikz) and your code
-    Displayables should only draw really really basic stuff such as a line or an arrow or a point"""
+    Displayables should only draw really really basic stuff such as a line or an arrow or a point
+    The coordinates and options of a displayable are immutable, so displayables share them freely instead of copying.
+    To change them, assign new coordinates or options instead of modifying them in place"""
+    __slots__ = ("_coordinates", "_options", "_validated_dims")
+
+    # Set to True by displayables whose coordinates are the vertices of a path, so the figure may simplify or clip them
+    is_path: bool = False
 
     @virtual
     def __init__(self) -> None:
@@ -19,8 +30,8 @@ class Displayable:
         raise NotImplementedError
 
     @virtual
-    def tikzify(self) -> str:
-        """The tikz command to draw"""
+    def tikzify(self, decimals: int | None = DECIMALS) -> str:
+        """The tikz command to draw. Coordinates are written with this many decimal places, or in full if decimals is None"""
         raise NotImplementedError
     
     @virtual
@@ -28,17 +39,61 @@ class Displayable:
         """Plots the figure on a GUI using matplotlib"""
         raise NotImplementedError
     
+    @classmethod
+    def plot_batch(cls, ax: Axes, displayables: list[Displayable], options: PlotOptions) -> Any:
+        """Plots many displayables of this type which share the same plot options at once, and returns the artist created. 
+        Subclasses should override this to create as few matplotlib artists as possible, by default this plots them one by one and returns None"""
+        for d in displayables:
+            d.plot(ax)
+        return None
+    
+    @classmethod
+    def update_batch(cls, artist: Any, coordinates: list[NDArray[np.float64]]) -> bool:
+        """Moves the artist returned by plot_batch to the new coordinates of its displayables, in the same order as they were plotted. 
+        Returns False if the artist cannot be updated in place, in which case the caller should plot the displayables again"""
+        return False
+    
     @property
-    def coordinates(self):
-        if not hasattr(self, "_coordinates") or self._coordinates is None:
-            self._coordinates: dict[str | int, Coordinates] = {}
-        return self._coordinates
+    def coordinates(self) -> NDArray[np.float64]:
+        """All the vertices of the displayable, stored as one contiguous (N, d) float64 array"""
+        try:
+            return self._coordinates
+        except AttributeError:
+            return _NO_COORDINATES
+    
+    @coordinates.setter
+    def coordinates(self, value: NDArray[np.float64]):
+        self._coordinates = freeze(value)
+
+        # The number of dimensions that a figure has checked the coordinates against, which is now out of date
+        self._validated_dims = None
     
     @property
-    def options(self):
-        if not hasattr(self, "_options") or self._options is None:
-            self._options = PlotOptions()
-        return self._options
+    def options(self) -> PlotOptions:
+        """The plot options of the displayable. Displayables without options share the default options"""
+        try:
+            return self._options
+        except AttributeError:
+            return DEFAULT_OPTIONS
+    
+    @options.setter
+    def options(self, value: PlotOptions):
+        self._options = value.intern()
+    
+    def with_coordinates(self, coords: NDArray[np.float64]):
+        """Returns a shallow copy of self with the coordinates replaced. 
+        The new coordinates are shared as a read-only view instead of copied, so the caller must not modify them afterwards"""
+        new = type(self).__new__(type(self))
+        for name in _slot_names(type(self)):
+            if hasattr(self, name):
+                setattr(new, name, getattr(self, name))
+        if hasattr(self, "__dict__"):
+            new.__dict__.update(self.__dict__)
+        view = coords.view()
+        view.flags.writeable = False
+        new._coordinates = view
+        new._validated_dims = None
+        return new
 
     @property
     def tikz_options(self) -> str:
@@ -47,3 +102,15 @@ class Displayable:
     @virtual
     def __copy__(self):
         raise NotImplementedError
+
+_NO_COORDINATES: NDArray[np.float64] = np.zeros((0, 0))
+_NO_COORDINATES.flags.writeable = False
+
+@cache
+def _slot_names(cls: type) -> tuple[str, ...]:
+    """All the slots declared by cls and its base classes"""
+    names: list[str] = []
+    for c in cls.__mro__:
+        slots = c.__dict__.get("__slots__", ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    return tuple(n for n in names if n not in ("__dict__", "__weakref__"))
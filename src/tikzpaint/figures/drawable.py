@@ -3,11 +3,13 @@ from __future__ import annotations
 from abc import ABC
 from abc import abstractmethod as virtual
 from typing import Generator, Any
+from dataclasses import replace
 import numpy as np
 
 from tikzpaint.figures.displayable import Displayable
-from tikzpaint.figures.options import PlotOptions
-from tikzpaint.util import Coordinates, copy
+from tikzpaint.figures.options import PlotOptions, DEFAULT_OPTIONS
+from tikzpaint.figures.projection import Projection
+from tikzpaint.util import Coordinates
 
 # Drawable are objects that has the draw iterator - which is defined via repeatedly yielding displayables
 
@@ -19,20 +21,25 @@ class Drawable(ABC):
     def draw(self)  -> Generator[Displayable, None, None]:
         pass
 
-    def figparse(self) -> Generator[Displayable, None, None]:
-        """This draw method is different because we also copy the plot options over, so we dont have to do this in figure.py"""
-        for disp in self.draw():
-            dis = copy(disp)
-            dis._options = copy(disp.options)
-            yield dis
+    def expand(self, projection: Projection | None = None, **settings) -> Generator[Displayable, None, None]:
+        """Yields the displayables, knowing the projection they will be rendered with, or None if it is not known in advance.
+        Drawables can override this to adapt to the projection, for example to sample curves more finely where the projection bends them.
+        For lazily drawn drawables, settings holds the other keyword arguments of the render, such as clip, which may be used to adapt the expansion as well.
+        By default this is the same as draw"""
+        yield from self.draw()
+
+    def figparse(self, projection: Projection | None = None, **settings) -> Generator[Displayable, None, None]:
+        """This draw method is used by figures to register the displayables. 
+        Displayables are immutable so they are handed over as is, without copying"""
+        yield from self.expand(projection, **settings)
     
     @property
     def option(self) -> PlotOptions:
         if not hasattr(self, "_options"):
-            self._options = PlotOptions()
+            self._options = DEFAULT_OPTIONS
         return self._options
     
     def set_option(self, option_key: str, option_val: Any):
         """Sets the option with key to value. Returns self, so you might use method chaining if you wish"""
-        self.option.__setattr__(option_key, option_val)
+        self._options = replace(self.option, **{option_key: option_val}).intern()
         return self
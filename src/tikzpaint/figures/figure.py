@@ -1,43 +1,104 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Generator, Iterable, TextIO, TYPE_CHECKING
+from contextlib import contextmanager
+from time import perf_counter
+import io
+import sys
+import hashlib
 import numpy as np
 
-from matplotlib.figure import Figure as matplotlibFigure
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-
-from tikzpaint.util import copy, DECIMALS, num_parameters
-from tikzpaint.util import NDArray
-from tikzpaint.util import Coordinates
+from tikzpaint.util import DECIMALS
+from tikzpaint.util import NDArray, Rect, round_array, simplify_path, clip_path, bbox_intersects, to_rect
 from tikzpaint.util.utils import notFalse
 
 from tikzpaint.figures.drawable import Drawable
 from tikzpaint.figures.displayable import Displayable
-from tikzpaint.figures.projection import Projection
+from tikzpaint.figures.projection import Projection, LinearProjection
 from tikzpaint.figures.options import PlotOptions
+from tikzpaint.figures.spatial import GridIndex
+from tikzpaint.figures.stats import RenderStats, StatsHook
+
+# Matplotlib is only imported when a figure is plotted, so that tikz output does not pay for importing it
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure as matplotlibFigure
+    from matplotlib.axes import Axes
+    from tikzpaint.figures.raster import Rasterizer
 
 class Figure:
     """Figures stores all the thinks you are about to draw
+    - ndims: int = the number of dimensions of the coordinates before projection
+    - projection: Projection = the default projection from Rn to R2 used for rendering. 
+        Drawables are also expanded with this projection in mind, for example lines are sampled adaptively
+    - decimals: int = the number of decimal places coordinates are rounded to and written with
+    - spatial_index: GridIndex = if given, the figure keeps the bounding boxes of the displayables after the default projection in this index
+        as they are registered. This enables the query and nearest methods, and lets clipping skip the displayables outside the view without projecting them
+    - cache: bool = if set to true, then the tikz code of every displayable is kept after rendering, so the next render only processes 
+        the displayables that changed. This holds the whole output in memory, so it is off by default and tikz output is streamed instead
+    
     Available kwargs:
-        - projection: Projection = defines a linear transformation from Rn to R2
-        - round: bool = if set to false, then we will skip the rounding step """
+        - projection: Projection = defines a linear transformation from Rn to R2, overriding the default projection of the figure
+        - round: bool = if set to false, then we will skip the rounding step
+        - simplify: bool | float = if set, then duplicate and collinear vertices are removed from paths after rounding. 
+            If a number is given, paths are further simplified so that they stay within this distance (in output units) of the original
+        - clip: float | tuple[float, float, float, float] = if set, then paths are clipped to the rectangle (xmin, ymin, xmax, ymax) after projection,
+            and other displayables entirely outside of it are dropped. A single number a denotes the square (-a, a) on both x and y axis
+        - dedupe: bool = if set to true, then displayables of the same type and plot options whose geometry is the same after rounding are only drawn once. 
+            Paths also count as the same when one is the other reversed"""
     
-    def __init__(self, ndims: int = 2) -> None:
+    def __init__(self, ndims: int = 2, projection: Projection | None = None, spatial_index: GridIndex | None = None, decimals: int = DECIMALS, 
+                 cache: bool = False) -> None:
+        if decimals < 0:
+            raise ValueError(f"Decimals must be greater or equal to 0, recieved {decimals}")
         self.toDraw : list[Displayable] = []
+        self.lazyDraw : list[tuple[int, Drawable]] = []
+        # Drawables that adapted their displayables to the default projection on registration: 
+        # (position in toDraw, the displayables, the drawable, the projection)
+        self._adapted : list[tuple[int, list[Displayable], Drawable, Projection | None]] = []
         self.ndims : int = ndims
+        self.projection : Projection | None = projection
+        self.decimals : int = decimals
+        self.cache : bool = cache
+        self.spatial_index : GridIndex | None = None
+        self.stats : RenderStats | None = None
+        self._instrumented : bool = False
+        self._stats_hook : StatsHook | None = None
+        self._stats : RenderStats | None = None
+        if spatial_index is not None:
+            self.reindex(spatial_index)
+    
+    def instrument(self, hook: StatsHook | None = None, enabled: bool = True) -> None:
+        """Turns on the collection of statistics. After every call to draw, tikzify, plot or preprocess, 
+        the statistics of the call are stored in self.stats as a RenderStats object and passed to hook if it is given
+        
+        - hook: a function that is called with the RenderStats after every operation, for example to send them to a metrics system
+        - enabled: bool = if set to false, then the collection of statistics is turned off again"""
+        self._instrumented = enabled
+        self._stats_hook = hook if enabled else None
+    
+    @contextmanager
+    def _measure(self, operation: str) -> Generator[None, None, None]:
+        """Collects the statistics of the operation if the figure is instrumented. Operations nested in another one are counted in the outer one"""
+        if not self._instrumented or self._stats is not None:
+            yield
+            return
+        
+        stats = self._stats = RenderStats(operation)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            stats.total = perf_counter() - start
+            self._stats = None
+        
+        self.stats = stats
+        if self._stats_hook is not None:
+            self._stats_hook(stats)
     
     # output is true, then print, otherwise return the whole thing as a string
     def tikzify(self, output: bool = True, indentation: int = 4, scale: float = 0.7, **kwargs) -> str:
         """Output the tikz code"""
-
-        if scale <= 0:
-            raise ValueError(f"Scale must be greater or equal to 0, recieved {scale}")
-
-        st = f"\\begin{{tikzpicture}}[scale={scale}]\n"
-        for d in self.preprocess(kwargs):
-            st += " " * indentation + d.tikzify() + "\n"
-        st += "\\end{tikzpicture}"
+        st = "".join(self.iter_tikz(indentation, scale, **kwargs))
 
         # Print the whole thing if needed
         if output:
@@ -45,21 +106,138 @@ class Figure:
         
         return st
     
-    def plot(self, show: bool = True, process_img: bool = False, off_axis: bool = True, bound: float = -1, **kwargs):
+    def iter_tikz(self, indentation: int = 4, scale: float = 0.7, **kwargs) -> Generator[str, None, None]:
+        """Yields the tikz code chunk by chunk, where every chunk holds the output of one displayable. 
+        The arguments are checked right away instead of on the first chunk"""
+        if scale <= 0:
+            raise ValueError(f"Scale must be greater or equal to 0, recieved {scale}")
+        return self._iter_tikz(indentation, scale, kwargs)
+    
+    def _iter_tikz(self, indentation: int, scale: float, kwargs: dict[str, Any]) -> Generator[str, None, None]:
+        with self._measure("tikz"):
+            yield f"\\begin{{tikzpicture}}[scale={scale}]\n"
+            for fragment in self.tikz_fragments(kwargs):
+                yield " " * indentation + fragment + "\n"
+            yield "\\end{tikzpicture}"
+    
+    def tikz_fragments(self, kwargs: dict[str, Any]) -> Generator[str, None, None]:
+        """Yields the tikz command of every displayable. If the figure caches its output, the commands are cached per displayable, keyed on its geometry,
+        its plot options and the render settings, so only the displayables that changed since the last call are processed again. 
+        Otherwise the commands are streamed, and only the commands of one displayable are held at a time"""
+        stats = self._stats
+        if not self.cache:
+            # Drop the fragments kept from when caching was on
+            self._fragment_cache = None
+        settings = self._render_key(kwargs) if self.cache else None
+        if settings is None:
+            for d in self.preprocess(kwargs):
+                if stats is not None:
+                    t = perf_counter()
+                fragment = d.tikzify(self._output_decimals(kwargs))
+                if stats is not None:
+                    stats.lap("format", t)
+                    stats.emit(type(d), d.coordinates.shape[0], fragment)
+                yield fragment
+            return
+        
+        dedupe = kwargs.get("dedupe", False)
+        decimals = self._output_decimals(kwargs)
+        seen: set[tuple] = set()
+
+        cache = self._fragments
+        displayables = self.displayables(kwargs)
+        if stats is not None:
+            t = perf_counter()
+        keys = [(settings, d.options, _geometry_key(d.coordinates)) for d in displayables]
+        # Also compare the displayable itself in case the id is reused by another object
+        hits = [id(d) in cache and cache[id(d)][0] is d and cache[id(d)][1] == key for d, key in zip(displayables, keys)]
+        if stats is not None:
+            stats.lap("cache", t)
+            stats.cache_hits += sum(hits)
+        processed = self._process(kwargs, [d for d, hit in zip(displayables, hits) if not hit])
+
+        fragments: dict[int, tuple[Displayable, Any, tuple[tuple[str, tuple | None, int], ...]]] = {}
+        for d, key, hit in zip(displayables, keys, hits):
+            if hit:
+                entry = cache[id(d)]
+            else:
+                pieces = next(processed)
+                if stats is not None:
+                    t = perf_counter()
+                # Remember the primitive keys as well, so the cached fragments can still be deduplicated against the rest of the figure
+                entry = (d, key, tuple((p.tikzify(decimals), primitive_key(p, self.decimals) if dedupe else None, p.coordinates.shape[0]) for p in pieces))
+                if stats is not None:
+                    stats.lap("format", t)
+            fragments[id(d)] = entry
+            for fragment, primitive, vertices in entry[2]:
+                if primitive is not None:
+                    if primitive in seen:
+                        continue
+                    seen.add(primitive)
+                if stats is not None:
+                    stats.emit(type(d), vertices, fragment)
+                yield fragment
+        
+        # Only keep the fragments of the displayables that are still in the figure
+        self._fragments = fragments
+    
+    def _render_key(self, kwargs: dict[str, Any]) -> tuple | None:
+        """Returns a hashable summary of the render settings, or None if the settings cannot be cached"""
+        projection_key = None
+        projection = self._projection(kwargs)
+        if projection is not None:
+            projection_key = projection.cache_key
+            if projection_key is None:
+                return None
+        return (projection_key, notFalse(kwargs, "round"), self.decimals, kwargs.get("simplify", False), kwargs.get("clip", None), kwargs.get("dedupe", False))
+    
+    @property
+    def _fragments(self) -> dict[int, tuple[Displayable, Any, tuple[tuple[str, tuple | None, int], ...]]]:
+        if not hasattr(self, "_fragment_cache") or self._fragment_cache is None:
+            self._fragment_cache: dict[int, tuple[Displayable, Any, tuple[tuple[str, tuple | None, int], ...]]] = {}
+        return self._fragment_cache
+    
+    @_fragments.setter
+    def _fragments(self, value: dict[int, tuple[Displayable, Any, tuple[tuple[str, tuple | None, int], ...]]]):
+        self._fragment_cache = value
+    
+    def write_tikz(self, file: str | TextIO, indentation: int = 4, scale: float = 0.7, buffer_size: int = io.DEFAULT_BUFFER_SIZE, **kwargs) -> None:
+        """Writes the tikz code to a file without holding the whole document in memory
+        
+        - file: either a path to write to or any object with a write method that accepts strings
+        - buffer_size: chunks are collected until they have at least this many characters before writing them out"""
+        write_chunks(file, self.iter_tikz(indentation, scale, **kwargs), buffer_size)
+    
+    def plot(self, show: bool = True, process_img: bool = False, off_axis: bool = True, bound: float = -1, batch: bool = False, **kwargs):
         """Output the figure
         
         - show: bool = if set to true, then we will display the image, otherwise we wont
         - process_img: bool = if set to true, then we will return the image of the plot in this function.
         - off_axis: bool = if set to True, then the axis will not appear in the resulting image
-        - bound: float = if -1, then there are no bounds, otherwise we restrict our view to (-a, a) on both x and y axis"""
+        - bound: float = if -1, then there are no bounds, otherwise we restrict our view to (-a, a) on both x and y axis
+        - batch: bool = if set to True, then displayables are grouped by type and style and every group is drawn with a single matplotlib artist. 
+            This is much faster for large figures, but groups are drawn on top of each other instead of in the order of registration"""
+        
+        # Images that are not shown are rendered off screen by a shared rasterizer, so pyplot is not involved
+        if process_img and not show:
+            rasterizer = _shared_rasterizer()
+            rasterizer.off_axis = off_axis
+            rasterizer.batch = batch
+            with self._measure("plot"):
+                image = rasterizer.render(self, bound = bound, **kwargs)
+            return image[:, :, :3].copy()
+
+        import matplotlib.pyplot as plt
 
         fig = plt.figure()   
 
         ax = fig.gca()     
 
-        for d in self.preprocess(kwargs):
-            d.plot(ax)
-            
+        # There is no point in drawing anything outside the view
+        if bound >= 0 and "clip" not in kwargs:
+            kwargs["clip"] = bound
+
+        self.plot_onto(ax, kwargs, batch)
         
         if bound >= 0:
             ax.set_xbound(-bound, bound)
@@ -78,26 +256,265 @@ class Figure:
         
         return arr
     
+    def plot_onto(self, ax: Axes, kwargs: dict[str, Any], batch: bool = False):
+        """Plots the figure onto ax, either one displayable at a time or in groups. See plot for the meaning of batch"""
+        with self._measure("plot"):
+            if batch:
+                self.plot_batched(ax, kwargs)
+                return
+            stats = self._stats
+            for d in self.preprocess(kwargs):
+                if stats is not None:
+                    t = perf_counter()
+                d.plot(ax)
+                if stats is not None:
+                    stats.lap("plot", t)
+                    stats.emit(type(d), d.coordinates.shape[0])
+    
+    def plot_batched(self, ax: Axes, kwargs: dict[str, Any]):
+        """Plots the figure onto ax, creating one artist per displayable type and plot options instead of one per displayable"""
+        with self._measure("plot"):
+            stats = self._stats
+            groups: dict[tuple[type[Displayable], PlotOptions], list[Displayable]] = {}
+            for d in self.preprocess(kwargs):
+                groups.setdefault((type(d), d.options), []).append(d)
+            
+            if stats is not None:
+                t = perf_counter()
+            for (cls, options), displayables in groups.items():
+                cls.plot_batch(ax, displayables, options)
+            ax.autoscale_view()
+            if stats is not None:
+                stats.lap("plot", t)
+                for (cls, _), displayables in groups.items():
+                    for d in displayables:
+                        stats.emit(cls, d.coordinates.shape[0])
+    
     def _draw(self, d: Drawable) -> None:
         """Draw one thing at a time"""
-        # Perform one checking first
-        for dis in d.draw():
-            for key, coord in dis.coordinates.items():
-                if not isinstance(coord, Coordinates):
-                    raise TypeError(f"The coordinate {key}: {coord} in {type(d).__name__} is not a coordinate point, recieved {type(coord).__name__}")
-                
-                if coord.n != self.ndims:
-                    raise ValueError(f"The coordinate {key}: {coord} in {type(d).__name__} has incorrect number of dimensions ({len(coord)}) before projection, expects {self.ndims}")
+        stats = self._stats
+        if stats is not None:
+            t = perf_counter()
+
+        # Without a projection, 2D figures are rendered as they are, which drawables can adapt to like any other linear projection
+        projection = self.projection
+        if projection is None and self.ndims == 2:
+            projection = _IDENTITY
+
+        # Run the drawable only once, and perform the checking on the whole batch
+        displayables = list(d.figparse(projection))
+        if stats is not None:
+            t = stats.lap("expand", t)
+        for dis in displayables:
+            self._validate(dis, type(d).__name__)
+        if stats is not None:
+            t = stats.lap("validate", t)
+
+        # Projecting the bounding boxes can fail as well, so do it before anything is registered
+        if self.spatial_index is not None:
+            boxes = [self._bounds(dis) for dis in displayables]
+            if stats is not None:
+                stats.lap("index", t)
+
+        # Remember drawables that adapt to the projection, so they can be expanded again for renders with a different projection
+        if projection is not None and type(d).expand is not Drawable.expand:
+            self._adapted.append((len(self.toDraw), displayables, d, self.projection))
 
         # Only append if everything passes the check   
-        for dis in d.figparse():
-            self.toDraw.append(dis)
+        self.toDraw.extend(displayables)
+        if self.spatial_index is not None:
+            for box in boxes:
+                self.spatial_index.insert(box)
+    
+    def _validate(self, d: Displayable, source: str):
+        """Checks that the coordinates of the displayable form an (N, ndims) float64 array, and records that the check passed 
+        so rendering does not need to check again. Assigning new coordinates to the displayable clears the record"""
+        if getattr(d, "_validated_dims", None) == self.ndims:
+            return
+        
+        coords = d.coordinates
+        if not isinstance(coords, np.ndarray) or coords.ndim != 2 or coords.dtype != np.float64:
+            raise TypeError(f"The coordinates in {source} must be stored as an (N, d) float64 array, recieved {type(coords).__name__}")
+        
+        # Displayables without vertices, such as labels, fit any number of dimensions
+        if coords.shape[0] > 0 and coords.shape[1] != self.ndims:
+            raise ValueError(f"The coordinates in {source} has incorrect number of dimensions ({coords.shape[1]}) before projection, expects {self.ndims}")
+        d._validated_dims = self.ndims
+    
+    def _coordinates_of(self, d: Displayable) -> NDArray[np.float64]:
+        """The coordinates of a displayable that passed validation, as an (N, ndims) array even if it has no vertices"""
+        coords = d.coordinates
+        if coords.shape[0] == 0 and coords.shape[1] != self.ndims:
+            return np.empty((0, self.ndims))
+        return coords
+    
+    def _bounds(self, d: Displayable) -> Rect:
+        """The bounding box of the displayable after the default projection, which is empty if the displayable has no vertices"""
+        coords = d.coordinates
+        if coords.shape[0] == 0:
+            # The index still needs an entry to keep its numbering in line with toDraw
+            return (np.inf, np.inf, -np.inf, -np.inf)
+        if self.projection is not None:
+            coords = self.projection.compile().batch(coords)
+        (xmin, ymin), (xmax, ymax) = coords.min(axis = 0), coords.max(axis = 0)
+        return (float(xmin), float(ymin), float(xmax), float(ymax))
+    
+    def reindex(self, spatial_index: GridIndex | None = None):
+        """Rebuilds the spatial index from the displayables in the figure. 
+        This is needed after modifying toDraw directly. If spatial_index is given, it replaces the current index and must be empty"""
+        if spatial_index is None:
+            if self.spatial_index is None:
+                raise ValueError("The figure does not have a spatial index")
+            spatial_index = GridIndex(self.spatial_index.cell_size, self.spatial_index.max_cells)
+        if len(spatial_index) > 0:
+            raise ValueError("The new spatial index must be empty")
+        if self.ndims != 2 and self.projection is None:
+            raise ValueError(f"A spatial index needs a projection to 2 dimensions, but the figure has {self.ndims} dimensions and no projection")
+        
+        boxes = [self._bounds(d) for d in self.toDraw]
+        for box in boxes:
+            spatial_index.insert(box)
+        self.spatial_index = spatial_index
+    
+    def query(self, rect: float | Rect) -> list[Displayable]:
+        """Returns the displayables whose bounding box after the default projection intersects the rectangle (xmin, ymin, xmax, ymax). 
+        A single number a denotes the square (-a, a) on both x and y axis"""
+        return [self.toDraw[i] for i in self._spatial_index.query(to_rect(rect))]
+    
+    def nearest(self, point: tuple[float, float], k: int = 1) -> list[Displayable]:
+        """Returns the k displayables closest to the point after the default projection, closest first"""
+        return [self.toDraw[i] for i in self._spatial_index.nearest(point, k)]
     
-    def draw(self, *d: Drawable):
+    @property
+    def _spatial_index(self) -> GridIndex:
+        if self.spatial_index is None:
+            raise ValueError("The figure does not have a spatial index, create the figure with a GridIndex or call reindex")
+        if len(self.spatial_index) != len(self.toDraw):
+            raise ValueError("The spatial index is out of sync with the displayables, call reindex after modifying toDraw")
+        return self.spatial_index
+    
+    def draw(self, *d: Drawable, lazy: bool = False):
         """Registers the drawable onto the drawing board, for rendering later
-        - d: the drawable object(s) to be drawn"""
-        for drawable in d:
-            self._draw(drawable)
+        - d: the drawable object(s) to be drawn
+        - lazy: bool = if set to true, then the drawables are only expanded into displayables when the figure is rendered, 
+            using the projection and the other keyword arguments of the render. The expansion is remembered for the next render with the same settings"""
+        with self._measure("draw"):
+            for drawable in d:
+                if lazy:
+                    self.lazyDraw.append((len(self.toDraw), drawable))
+                else:
+                    self._draw(drawable)
+    
+    def displayables(self, kwargs: dict[str, Any] | None = None, readapt: bool = False) -> list[Displayable]:
+        """All the displayables to render with the keyword arguments kwargs, in order of registration. 
+        This is toDraw together with the expansions of the lazy drawables. Drawables that adapted to the default projection on registration 
+        are expanded again if the render uses a different projection
+        
+        - readapt: bool = if set to true, then the drawables that adapted to the default projection are always expanded again. 
+            Together with a projection of None, this gives displayables that do not assume any projection, for example to animate them under many projections"""
+        kwargs = {} if kwargs is None else kwargs
+        projection = self._projection(kwargs)
+
+        # (position in toDraw, number of displayables replaced, drawable)
+        edits: list[tuple[int, int, Drawable]] = [(position, 0, drawable) for position, drawable in self.lazyDraw]
+        for position, expanded, drawable, drawn_with in self._adapted:
+            if not readapt and _same_projection(projection, drawn_with):
+                continue
+            # Skip the drawables whose displayables were taken out of toDraw since
+            current = self.toDraw[position:position + len(expanded)]
+            if len(current) == len(expanded) and all(a is b for a, b in zip(current, expanded)):
+                edits.append((position, len(expanded), drawable))
+        
+        if not edits:
+            return self.toDraw
+        
+        stats = self._stats
+        if stats is not None:
+            t = perf_counter()
+        
+        edits.sort(key = lambda x: (x[0], x[1]))
+        result: list[Displayable] = []
+        last = 0
+        for position, length, drawable in edits:
+            result.extend(self.toDraw[last:position])
+            last = max(last, position + length)
+            result.extend(self._expand(drawable, kwargs))
+        result.extend(self.toDraw[last:])
+
+        if stats is not None:
+            stats.lap("expand", t)
+        return result
+    
+    def _expand(self, d: Drawable, kwargs: dict[str, Any]) -> list[Displayable]:
+        """Expands a lazy drawable for the render settings, reusing the last expansion if the settings are the same"""
+        projection = self._projection(kwargs)
+        settings = {k: v for k, v in kwargs.items() if k != "projection"}
+
+        key: tuple | None = None
+        try:
+            projection_key = None if projection is None else projection.cache_key
+            if projection is None or projection_key is not None:
+                key = (projection_key, frozenset(settings.items()))
+                hash(key)
+        except TypeError:
+            key = None
+        
+        entry = self._expansions.get(id(d))
+        if key is not None and entry is not None and entry[0] is d and entry[1] == key:
+            return entry[2]
+        
+        displayables = list(d.figparse(projection, **settings))
+        for dis in displayables:
+            self._validate(dis, type(d).__name__)
+        if key is not None:
+            self._expansions[id(d)] = (d, key, displayables)
+        return displayables
+    
+    @property
+    def _expansions(self) -> dict[int, tuple[Drawable, tuple, list[Displayable]]]:
+        if not hasattr(self, "_expansion_cache") or self._expansion_cache is None:
+            self._expansion_cache: dict[int, tuple[Drawable, tuple, list[Displayable]]] = {}
+        return self._expansion_cache
+    
+    def _can_cull_with_index(self, kwargs: dict[str, Any]) -> bool:
+        """True if the spatial index is in sync and was built with the projection we render with"""
+        if self.spatial_index is None or len(self.spatial_index) != len(self.toDraw) or len(self.toDraw) == 0 or self.lazyDraw:
+            return False
+        return _same_projection(self._projection(kwargs), self.projection)
+    
+    def _output_decimals(self, kwargs: dict[str, Any]) -> int | None:
+        """The number of decimal places to write coordinates with, or None to write them in full if rounding is turned off"""
+        return self.decimals if notFalse(kwargs, "round") else None
+    
+    def _projection(self, kwargs: dict[str, Any]) -> Projection | None:
+        """The projection to render with, which is the projection in kwargs if there is one, otherwise the default projection of the figure"""
+        return kwargs.get("projection", self.projection)
+    
+    def memory_footprint(self) -> dict[str, int]:
+        """Reports the approximate number of bytes used by the registered displayables. 
+        Arrays and plot options shared between displayables are only counted once"""
+        objects = sys.getsizeof(self.toDraw)
+        arrays: dict[int, int] = {}
+        options: dict[int, int] = {}
+        for d in self.toDraw:
+            objects += sys.getsizeof(d)
+            if hasattr(d, "__dict__"):
+                objects += sys.getsizeof(d.__dict__)
+
+            # The array data is attributed to the array that owns the memory, so shared buffers are counted once
+            coords = d.coordinates
+            owner = coords if coords.base is None else coords.base
+            arrays[id(owner)] = owner.nbytes if isinstance(owner, np.ndarray) else coords.nbytes
+            objects += sys.getsizeof(coords) - (coords.nbytes if coords.base is None else 0)
+            options[id(d.options)] = sys.getsizeof(d.options)
+        
+        footprint = {
+            "displayables": objects,
+            "coordinates": sum(arrays.values()),
+            "options": sum(options.values()),
+        }
+        footprint["total"] = sum(footprint.values())
+        return footprint
     
     @property
     def options(self):
@@ -105,45 +522,178 @@ class Figure:
             self._options: list[str] = []
         return self._options
     
-    def preprocess(self, kwargs: dict[str, Any]):
-        for displayable in self.toDraw:
-
-            # Make a copy first to avoid modification of the original
-            d = copy(displayable)
-
-            for key, coord in d.coordinates.items():
-                # Check type
-                if not isinstance(coord, Coordinates):
-                    raise TypeError(f"The coordinate {key}: {coord} in {type(d).__name__} is not a coordinate point, recieved {type(coord).__name__}")
-                
-                # Check length of coordinates
-                if len(coord) != self.ndims:
-                    raise ValueError(f"The coordinate {key}: {coord} in {d} has incorrect number of dimensions before projection: {len(coord)}")
-
-                # Perform projection
-                if "projection" in kwargs:
-                    proj: Projection = kwargs["projection"]
-                    if not proj.result_dims == 2:
-                        raise ValueError(f"Output of projection dimensions must be 2, recieved {proj.result_dims} instead")
-                    if not proj.input_dims == self.ndims:
-                        raise ValueError(f"Input of projection dimensions must be {self.ndims}, recieved {proj.input_dims} instead")
-                    d.coordinates[key] = coord = proj(coord)
-                
-                # Perform rounding by default unless explicitly set to false
-                if notFalse(kwargs, "round"):
-                    d.coordinates[key] = coord = Coordinates(round(x, DECIMALS) for x in coord)
-
-                # Check dimensions
-                if len(coord) != 2:
-                    raise ValueError(f"The coordinate {key}: {coord} in {d} has incorrect number of dimensions: {len(coord)}")
-            
+    def preprocess(self, kwargs: dict[str, Any], displayables: list[Displayable] | None = None):
+        """Projects and rounds the displayables (by default every displayable in the figure), yielding them in order
+        The yielded displayables share their options with the originals and only hold new coordinates, so nothing is copied.
+        Displayables that are clipped away are skipped, and clipped paths may be split into several displayables.
+        If deduplication is on, displayables that would draw exactly the same thing as an earlier one are skipped as well"""
+        with self._measure("preprocess"):
+            dedupe = kwargs.get("dedupe", False)
+            seen: set[tuple] = set()
+            for pieces in self._process(kwargs, self.displayables(kwargs) if displayables is None else displayables):
+                for d in pieces:
+                    if dedupe:
+                        key = primitive_key(d, self.decimals)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    yield d
+    
+    def _process(self, kwargs: dict[str, Any], displayables: list[Displayable], use_index: bool = True) -> Generator[list[Displayable], None, None]:
+        """Runs the render pipeline on the displayables, yielding the list of resulting displayables for every input displayable in order"""
+        stats = self._stats
+        if stats is not None:
+            t = perf_counter()
+
+        # Check type and length of coordinates, which is skipped for the displayables that passed the check on registration
+        for d in displayables:
+            self._validate(d, type(d).__name__)
+        if stats is not None:
+            t = stats.lap("validate", t)
+        
+        if not displayables:
+            return
+        
+        rect = to_rect(kwargs["clip"]) if kwargs.get("clip", None) is not None else None
+
+        # Skip the displayables that the spatial index knows are outside the view, without projecting them
+        if rect is not None and use_index and self._can_cull_with_index(kwargs):
+            # Grow the rectangle a little since the index does not see the rounding
+            margin = 10 ** -self.decimals
+            visible_ids = {id(self.toDraw[i]) for i in self._spatial_index.query((rect[0] - margin, rect[1] - margin, rect[2] + margin, rect[3] + margin))}
+            # Displayables without vertices are not in the view, but they are not outside of it either
+            mask = [id(d) in visible_ids or d.coordinates.shape[0] == 0 for d in displayables]
+            if stats is not None:
+                stats.lap("cull", t)
+            pieces = self._process(kwargs, [d for d, m in zip(displayables, mask) if m], use_index = False)
+            for m in mask:
+                yield next(pieces) if m else []
+            return
+        
+        # Gather every coordinate in the figure so that we only need to project once
+        lengths = [d.coordinates.shape[0] for d in displayables]
+        coords = np.concatenate([self._coordinates_of(d) for d in displayables])
+        if stats is not None:
+            t = stats.lap("concatenate", t)
+            stats.copies += 1
+
+        # Perform projection
+        projection = self._projection(kwargs)
+        if projection is not None:
+            proj = projection.compile()
+            if not proj.result_dims == 2:
+                raise ValueError(f"Output of projection dimensions must be 2, recieved {proj.result_dims} instead")
+            if not proj.input_dims == self.ndims:
+                raise ValueError(f"Input of projection dimensions must be {self.ndims}, recieved {proj.input_dims} instead")
+            coords = proj.batch(coords)
+            if stats is not None:
+                t = stats.lap("project", t)
+                stats.copies += 1
+        
+        # Perform rounding by default unless explicitly set to false
+        if notFalse(kwargs, "round"):
+            coords = round_array(coords, self.decimals)
+            if stats is not None:
+                t = stats.lap("round", t)
+                stats.copies += 1
+
+        # Check dimensions
+        if coords.shape[1] != 2:
+            raise ValueError(f"The coordinates in the figure has incorrect number of dimensions: {coords.shape[1]}")
+        
+        # Any falsy value turns simplification off
+        simplify = kwargs.get("simplify", False) or False
+        tolerance = 0 if simplify is True else float(simplify)
+        grid_decimals = self.decimals if notFalse(kwargs, "round") else None
+
+        if rect is not None:
+            offsets = np.cumsum([0] + lengths)
+            visible = bbox_intersects(coords, offsets, rect)
+            if stats is not None:
+                stats.lap("cull", t)
+
+        for i, (d, c) in enumerate(zip(displayables, np.split(coords, np.cumsum(lengths)[:-1]))):
+            # Cull everything outside the view, and clip the paths that cross the boundary
+            if rect is not None and not visible[i]:
+                yield []
+                continue
+
+            if stats is not None:
+                t = perf_counter()
+            pieces = clip_path(c, rect) if rect is not None and d.is_path else [c]
+            if stats is not None and rect is not None:
+                t = stats.lap("clip", t)
+
+            # Simplify the paths
+            if simplify is not False and d.is_path:
+                pieces = [simplify_path(p, tolerance, grid_decimals) for p in pieces]
+                if stats is not None:
+                    stats.lap("simplify", t)
+
             # Make this a generator
-            yield d
+            yield [d.with_coordinates(p) for p in pieces]
+
+
+def write_chunks(file: str | TextIO, chunks: Iterable[str], buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> None:
+    """Writes the chunks to a path or a file-like object, collecting them until they have at least buffer_size characters before every write"""
+    if isinstance(file, str):
+        with open(file, "w", buffering = buffer_size) as f:
+            write_chunks(f, chunks, buffer_size)
+        return
+    
+    buffer: list[str] = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= buffer_size:
+            file.write("".join(buffer))
+            buffer.clear()
+            buffered = 0
+    
+    if buffer:
+        file.write("".join(buffer))
+
+def primitive_key(d: Displayable, decimals: int = DECIMALS) -> tuple:
+    """A hashable key that is equal for displayables which draw the same thing, after quantizing the coordinates to this many decimal places. 
+    For paths, the key is the same for both directions of the path"""
+    q = np.rint(d.coordinates * 10 ** decimals).astype(np.int64)
+    data = q.tobytes()
+    if d.is_path and q.shape[0] > 1:
+        data = min(data, q[::-1].tobytes())
+    return (type(d), d.options, q.shape, data)
+
+# The map from the coordinates of a 2D figure without projection to the output
+_IDENTITY = LinearProjection(np.eye(2))
+
+def _same_projection(p1: Projection | None, p2: Projection | None) -> bool:
+    """True if the two projections are known to perform the same map"""
+    if p1 is p2:
+        return True
+    return p1 is not None and p2 is not None and p1.cache_key is not None and p1.cache_key == p2.cache_key
+
+def _geometry_key(coords: NDArray) -> tuple:
+    """A digest of the coordinates, used to detect changes in the geometry of a displayable"""
+    coords = np.ascontiguousarray(coords)
+    return (coords.shape, hashlib.blake2b(coords.data, digest_size = 16).digest())
+
+def _shared_rasterizer() -> Rasterizer:
+    """The rasterizer used by Figure.plot for images that are not shown, created on first use with the default size of matplotlib figures"""
+    global _RASTERIZER
+    if _RASTERIZER is None:
+        from matplotlib import rcParams
+        from tikzpaint.figures.raster import Rasterizer
+        width, height = rcParams["figure.figsize"]
+        dpi = rcParams["figure.dpi"]
+        _RASTERIZER = Rasterizer(round(width * dpi), round(height * dpi), dpi)
+    return _RASTERIZER
 
+_RASTERIZER: Rasterizer | None = None
 
 def mpl_to_np(fig: matplotlibFigure, offaxis: bool = True) -> NDArray[np.uint8]:
     """Converts a matplotlib figure to a RGB frame after updating the canvas."""
 
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
     canvas = FigureCanvasAgg(fig)
     if offaxis:
         ax = fig.gca()
@@ -154,7 +704,7 @@ def mpl_to_np(fig: matplotlibFigure, offaxis: bool = True) -> NDArray[np.uint8]:
     l, b, w, h = canvas.figure.bbox.bounds #type: ignore
     w, h = int(w), int(h)
 
-    #  exports the canvas to a string buffer and then to a numpy nd.array
-    buf = canvas.tostring_rgb()
-    image = np.frombuffer(buf, dtype=np.uint8) #type: ignore
-    return image.reshape(h, w, 3)
+    # exports the canvas buffer to a numpy nd.array, dropping the alpha channel. 
+    # This needs a copy because the canvas goes away with this function
+    image = np.asarray(canvas.buffer_rgba())
+    return image[:h, :w, :3].copy()
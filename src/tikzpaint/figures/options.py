@@ -1,7 +1,9 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
 from typing import Any
 
-@dataclass
+@dataclass(frozen = True, slots = True)
 class PlotOptions:
     COLORCODE = {
         "red":      '#ee0000', 
@@ -25,7 +27,8 @@ class PlotOptions:
         "white":    '#eeeeee'
     }
 
-    """The options class is an object that holds the options for drawing, such as color of line and width of line etc"""
+    """The options class is an object that holds the options for drawing, such as color of line and width of line etc
+    Plot options are immutable so they can be shared between displayables, use dataclasses.replace to derive new options"""
     color: str = "black"
     width: float = 1
     opacity: float = 1
@@ -45,5 +48,25 @@ class PlotOptions:
             ls_options.append(f"draw opacity={self.opacity}")
         return ", ".join(ls_options)
     
+    def intern(self) -> PlotOptions:
+        """Returns the shared instance of the options equal to self, so that equal options are only stored once.
+        The pool holds at most POOL_SIZE options and lives as long as the process. Once it is full, options that are not
+        in the pool yet are returned as is instead of being added, so sharing degrades gracefully but memory stays bounded"""
+        shared = _POOL.get(self)
+        if shared is not None:
+            return shared
+        if len(_POOL) < POOL_SIZE:
+            _POOL[self] = self
+        return self
+    
     def __copy__(self):
-        return PlotOptions(self.color, self.width, self.opacity)
+        # Immutable, so there is nothing to copy
+        return self
+
+# The pool of interned plot options, so displayables with the same style share a single options object
+# The pool is never emptied, so it is capped to keep per-point styles or options loaded from many packs
+# from piling up in long-running processes
+POOL_SIZE = 4096
+_POOL: dict[PlotOptions, PlotOptions] = {}
+
+DEFAULT_OPTIONS = PlotOptions().intern()
@@ -3,8 +3,8 @@ from __future__ import annotations
 from abc import ABC
 from abc import abstractmethod as virtual
 from typing import Callable, Any
-import matplotlib.pyplot as plt
 from inspect import signature
+from functools import lru_cache
 import numpy as np
 
 from tikzpaint.util import copy, NDArray, to_superscript, isZero, get_orthonormal_basis
@@ -28,44 +28,86 @@ class Projection(ABC):
     def __call__(self, t: Coordinates) -> Coordinates:
         raise NotImplementedError
     
+    @property
+    def is_linear(self) -> bool:
+        """True if the projection is known to be linear, so that straight lines stay straight after projection"""
+        return False
+    
+    @property
+    def cache_key(self) -> tuple | None:
+        """A hashable value that is equal for projections that perform the same map. 
+        This is used to cache rendered output, and projections that return None are never cached"""
+        return None
+    
+    def batch(self, t: NDArray) -> NDArray[np.float64]:
+        """Projects a whole (N, input_dims) array of points at once and returns an (N, result_dims) array.
+        The default implementation calls the projection on every point, subclasses should override this with a vectorized version"""
+        if t.shape[0] == 0:
+            return np.zeros((0, self.result_dims))
+        return np.array([self(Coordinates(x)) for x in t], dtype = np.float64)
+    
     @virtual
     def __copy__(self):
         raise NotImplementedError
 
-    def combine(self, p2: Projection):
-        class MixedProjection(Projection):
-            # THis constructor is private
-            def __init__(self, p1: Projection, p2: Projection):
-                if not p1.result_dims == p2.input_dims:
-                    raise ValueError(f"The output dimensions f p1 ({p1.result_dims}) is not the same as the input dimensions of p2 ({p2.input_dims})")
-                self.p1 = copy(p1)
-                self.p2 = copy(p2)
-            
-            def input_dims(self) -> int:
-                return self.p1.input_dims
-            
-            def result_dims(self) -> int:
-                return self.p2.result_dims
-            
-            def __call__(self, t: Coordinates) -> Coordinates:
-                t = self.p1(t)
-                return self.p2(t)
-            
-            def __copy__(self):
-                return MixedProjection(copy(self.p1), copy(self.p2))
-
-        return self.combine(p2)
+    def combine(self, p2: Projection) -> Projection:
+        """Combines the projection self and p2, performing self first then p2"""
+        return MixedProjection(self, p2)
+    
+    def compile(self) -> ProjectionPipeline:
+        """Returns a pipeline equivalent to this projection, where adjacent linear projections are folded into one matrix.
+        The result is cached on the projection so repeated renders do not recompile it"""
+        if not hasattr(self, "_compiled") or self._compiled is None:
+            self._compiled = ProjectionPipeline(self)
+        return self._compiled
     
     def __mul__(self, other: Projection):
         return self.combine(other)
 
+class MixedProjection(Projection):
+    """The composition of two projections, performing p1 first then p2"""
+    def __init__(self, p1: Projection, p2: Projection):
+        if not p1.result_dims == p2.input_dims:
+            raise ValueError(f"The output dimensions f p1 ({p1.result_dims}) is not the same as the input dimensions of p2 ({p2.input_dims})")
+        self.p1 = copy(p1)
+        self.p2 = copy(p2)
+    
+    @property
+    def input_dims(self) -> int:
+        return self.p1.input_dims
+    
+    @property
+    def result_dims(self) -> int:
+        return self.p2.result_dims
+    
+    def __call__(self, t: Coordinates) -> Coordinates:
+        t = self.p1(t)
+        return self.p2(t)
+    
+    def batch(self, t: NDArray) -> NDArray[np.float64]:
+        return self.compile().batch(t)
+    
+    @property
+    def is_linear(self) -> bool:
+        return self.compile().is_linear
+    
+    @property
+    def cache_key(self) -> tuple | None:
+        return self.compile().cache_key
+    
+    def __copy__(self):
+        return MixedProjection(copy(self.p1), copy(self.p2))
+
 class LinearProjection(Projection):
     """Projection is a function object useful for defining projections of coordinates
     array: the matrix for the linear projection"""
     def __init__(self, array: NDArray):
         if not len(array.shape) == 2:
             raise ValueError(f"The array should be in 2 dimensions, recieved an array with shape {array.shape} instead")
-        self.matrix = copy(array)
+        self.matrix = np.array(array, dtype = np.float64)
+
+        # Projections are shared through caches, so make sure nobody modifies the matrix in place
+        self.matrix.flags.writeable = False
 
     @property
     def input_dims(self):
@@ -82,11 +124,26 @@ class LinearProjection(Projection):
         v = self.matrix @ v
         return Coordinates(v)
     
+    @property
+    def is_linear(self) -> bool:
+        return True
+    
+    @property
+    def cache_key(self) -> tuple | None:
+        return ("linear", self.matrix.shape, self.matrix.tobytes())
+    
+    def batch(self, t: NDArray) -> NDArray[np.float64]:
+        if t.ndim != 2 or t.shape[1] != self.input_dims:
+            raise ValueError(f"The shape of t is expected to be (N, {self.input_dims}), got {t.shape} instead")
+        return t @ self.matrix.T
+    
     def __copy__(self):
         return LinearProjection(self.matrix)
     
-    def combine(self, p2: LinearProjection):
+    def combine(self, p2: Projection) -> Projection:
         """Combines the linear projection self and p2, performing self first then p2"""
+        if not isinstance(p2, LinearProjection):
+            return super().combine(p2)
         if not self.result_dims == p2.input_dims:
             raise ValueError(f"The output dimensions of self ({self.result_dims}) is not the same as the input dimensions of p2 ({p2.input_dims})")
         return LinearProjection(p2.matrix @ self.matrix)
@@ -134,10 +191,109 @@ class StereographicProjection(Projection):
             t = Coordinates([0.999, 0.0019999] + [x for i, x in enumerate(t) if i >= 2])
         return Coordinates(x / (1 - t[0]) for i, x in enumerate(t) if i >= 1)
     
+    @property
+    def cache_key(self) -> tuple | None:
+        return ("stereographic", self.n)
+    
+    def batch(self, t: NDArray) -> NDArray[np.float64]:
+        if t.ndim != 2 or t.shape[1] != self.n:
+            raise ValueError(f"The shape of t is expected to be (N, {self.n}), got {t.shape} instead")
+        norms = np.sqrt(np.sum(t * t, axis = 1))
+        if not isZero(norms - 1):
+            bad = t[np.argmax(np.abs(norms - 1))]
+            raise ValueError(f"t: {Coordinates(bad)} is not a point on the unit sphere in R{to_superscript(self.n)}")
+        
+        # Nudge the points sitting on the pole the same way as __call__ does
+        poles = t[:, 0] == 1
+        if np.any(poles):
+            t = np.array(t, dtype = np.float64)
+            t[poles, 0] = 0.999
+            t[poles, 1] = 0.0019999
+        return t[:, 1:] / (1 - t[:, :1])
+    
     @staticmethod
-    def fromOrigin(castOrigin: Coordinates):
-        stereo = StereographicProjection(len(castOrigin))
-        # First make the origin to (1, 0, 0, ...)
-        scale = LinearProjection.scale(tuple(1 / castOrigin.magnitude for _ in castOrigin))
-        move = get_orthonormal_basis(castOrigin.normalized())
-        return scale * move * stereo
+    def fromOrigin(castOrigin: Coordinates) -> ProjectionPipeline:
+        """Defines a stereographic projection from the sphere centered at the origin passing through castOrigin, casting from castOrigin.
+        The result is memoized by the origin, so asking for the same projection again is free"""
+        return _stereographic_from_origin(tuple(float(x) for x in castOrigin))
+
+@lru_cache(maxsize = 128)
+def _stereographic_from_origin(castOrigin: tuple[float, ...]) -> ProjectionPipeline:
+    origin = Coordinates(castOrigin)
+    stereo = StereographicProjection(len(origin))
+
+    # First make the origin to (1, 0, 0, ...)
+    scale = LinearProjection.scale(tuple(1 / origin.magnitude for _ in origin))
+    basis = get_orthonormal_basis(origin.normalized())
+
+    # QR only determines the first basis vector up to a sign
+    if basis[:, 0] @ np.array(origin) < 0:
+        basis[:, 0] = -basis[:, 0]
+    move = LinearProjection(basis.T)
+    return (scale * move * stereo).compile()
+
+class ProjectionPipeline(Projection):
+    """A compiled chain of projections. Adjacent linear projections are folded into a single matrix,
+    and the remaining stages are run on whole arrays of points with their vectorized batch methods
+
+    *stages: the projections to perform, in order"""
+    def __init__(self, *stages: Projection):
+        flattened: list[Projection] = []
+        for stage in stages:
+            flattened.extend(_flatten(stage))
+        
+        if not flattened:
+            raise ValueError("A projection pipeline needs at least one stage")
+        
+        for p1, p2 in zip(flattened, flattened[1:]):
+            if not p1.result_dims == p2.input_dims:
+                raise ValueError(f"The output dimensions of {type(p1).__name__} ({p1.result_dims}) is not the same as the input dimensions of {type(p2).__name__} ({p2.input_dims})")
+
+        # Fold adjacent linear projections
+        self.stages: list[Projection] = []
+        for stage in flattened:
+            if self.stages and isinstance(stage, LinearProjection) and isinstance(self.stages[-1], LinearProjection):
+                self.stages[-1] = self.stages[-1].combine(stage)
+            else:
+                self.stages.append(stage)
+    
+    @property
+    def input_dims(self) -> int:
+        return self.stages[0].input_dims
+    
+    @property
+    def result_dims(self) -> int:
+        return self.stages[-1].result_dims
+    
+    def __call__(self, t: Coordinates) -> Coordinates:
+        return Coordinates(self.batch(np.array(t, dtype = np.float64).reshape(1, -1))[0])
+    
+    @property
+    def is_linear(self) -> bool:
+        return all(stage.is_linear for stage in self.stages)
+    
+    @property
+    def cache_key(self) -> tuple | None:
+        keys = tuple(stage.cache_key for stage in self.stages)
+        if None in keys:
+            return None
+        return keys
+    
+    def batch(self, t: NDArray) -> NDArray[np.float64]:
+        for stage in self.stages:
+            t = stage.batch(t)
+        return t
+    
+    def compile(self) -> ProjectionPipeline:
+        return self
+    
+    def __copy__(self):
+        return ProjectionPipeline(*self.stages)
+
+def _flatten(p: Projection) -> list[Projection]:
+    """Splits a projection into the list of stages it performs"""
+    if isinstance(p, ProjectionPipeline):
+        return list(p.stages)
+    if isinstance(p, MixedProjection):
+        return _flatten(p.p1) + _flatten(p.p2)
+    return [p]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+import numpy as np
+
+from tikzpaint.util import NDArray
+from tikzpaint.figures.figure import Figure
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
+class Rasterizer:
+    """A headless renderer that turns figures into RGBA images. The matplotlib figure and canvas are created once and reused 
+    for every render, and pyplot is never touched, so rasterizing many figures does not pay for creating and destroying windows
+    
+    - width, height: the size of the output image in pixels
+    - dpi: the resolution used to rasterize the figure
+    - off_axis: bool = if set to True, then the axis will not appear in the resulting images
+    - batch: bool = if set to True, then displayables are drawn in groups with one artist per style. See Figure.plot"""
+    def __init__(self, width: int = 640, height: int = 480, dpi: float = 100, off_axis: bool = True, batch: bool = True) -> None:
+        if width <= 0 or height <= 0:
+            raise ValueError(f"The size of the image must be positive, recieved ({width}, {height})")
+        if dpi <= 0:
+            raise ValueError(f"DPI must be positive, recieved {dpi}")
+        
+        # Matplotlib is only imported once a rasterizer is created
+        from matplotlib.figure import Figure as matplotlibFigure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.figure = matplotlibFigure(figsize = (width / dpi, height / dpi), dpi = dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.off_axis = off_axis
+        self.batch = batch
+    
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """The shape of the images produced by this rasterizer"""
+        w, h = self.canvas.get_width_height()
+        return (h, w, 4)
+    
+    def render(self, fig: Figure, out: NDArray[np.uint8] | None = None, bound: float = -1, **kwargs) -> NDArray[np.uint8]:
+        """Rasterizes the figure and returns an (height, width, 4) RGBA array
+        
+        - out: if provided, the image is copied into this array, which is then returned. 
+            Otherwise the returned array is a view over the canvas buffer without copying, which is overwritten by the next render
+        - bound: float = if -1, then there are no bounds, otherwise we restrict our view to (-a, a) on both x and y axis
+        - kwargs: the same keyword arguments as Figure.plot, such as projection"""
+        if out is not None and out.shape != self.shape:
+            raise ValueError(f"The output array must have shape {self.shape}, recieved {out.shape} instead")
+        
+        ax = self.reset()
+
+        # There is no point in drawing anything outside the view
+        if bound >= 0 and "clip" not in kwargs:
+            kwargs["clip"] = bound
+
+        fig.plot_onto(ax, kwargs, self.batch)
+        
+        if bound >= 0:
+            ax.set_xbound(-bound, bound)
+            ax.set_ybound(-bound, bound)
+        
+        return self.capture(out)
+    
+    def reset(self) -> Axes:
+        """Removes everything drawn on the axes and returns them. 
+        Only the drawn artists are removed, since clearing the axes rebuilds the ticks and spines which costs more than drawing small figures"""
+        ax = self.ax
+        for artists in (ax.lines, ax.collections, ax.patches, ax.texts, ax.images, ax.artists):
+            for artist in list(artists):
+                artist.remove()
+        
+        # Forget the limits of the last render, which also turns autoscaling back on after set_xbound turned it off
+        ax.relim()
+        ax.set_autoscale_on(True)
+        if self.off_axis:
+            ax.set_axis_off()
+        else:
+            ax.set_axis_on()
+        return ax
+    
+    def capture(self, out: NDArray[np.uint8] | None = None) -> NDArray[np.uint8]:
+        """Draws whatever is currently on the axes and returns the image. See render for the meaning of out"""
+        self.canvas.draw()
+        image: NDArray[np.uint8] = np.asarray(self.canvas.buffer_rgba())
+
+        if out is None:
+            return image
+        np.copyto(out, image)
+        return out
+    
+    def close(self):
+        """Releases the matplotlib figure"""
+        self.figure.clear()
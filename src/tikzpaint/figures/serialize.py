@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, astuple
+from typing import Any
+from importlib import import_module
+import json
+import os
+import struct
+import numpy as np
+
+from tikzpaint.util import NDArray, DECIMALS
+from tikzpaint.figures.displayable import Displayable
+from tikzpaint.figures.figure import Figure
+from tikzpaint.figures.options import PlotOptions
+from tikzpaint.figures.projection import Projection, LinearProjection, StereographicProjection, ProjectionPipeline
+
+@dataclass
+class FigurePack:
+    """A compact, flat representation of the displayables registered on a figure. 
+    Instead of an object graph, the geometry is stored in a handful of arrays which are cheap to pickle, send and store
+    
+    - ndims: the number of dimensions of the figure
+    - coordinates: the (V, ndims) array of all the vertices, with the displayables laid out one after another
+    - offsets: the (P + 1,) array such that the vertices of the i-th displayable are coordinates[offsets[i]:offsets[i + 1]]
+    - kinds: the (P,) array of indices into kind_table, denoting the type of every displayable
+    - option_ids: the (P,) array of indices into options_table, denoting the plot options of every displayable
+    - kind_table: the names of the displayable types, as "module:qualname"
+    - options_table: the distinct plot options, as tuples of their fields
+    - decimals: the number of decimal places of the figure
+    - projection: the default projection of the figure"""
+    ndims: int
+    coordinates: NDArray[np.float64]
+    offsets: NDArray[np.int64]
+    kinds: NDArray[np.int32]
+    option_ids: NDArray[np.int32]
+    kind_table: list[str]
+    options_table: list[tuple]
+    decimals: int = DECIMALS
+    projection: Projection | None = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+def pack_figure(fig: Figure, kwargs: dict[str, Any] | None = None, displayables: list[Displayable] | None = None) -> FigurePack:
+    """Packs the displayables of the figure into a FigurePack. Only the type, coordinates and plot options of every displayable are kept. 
+    Lazily drawn drawables are expanded with the render keyword arguments kwargs, unless the displayables to pack are given"""
+    if displayables is None:
+        displayables = fig.displayables(kwargs)
+    kind_ids: dict[type, int] = {}
+    option_ids: dict[PlotOptions, int] = {}
+    kinds = np.empty(len(displayables), dtype = np.int32)
+    options = np.empty(len(displayables), dtype = np.int32)
+    offsets = np.zeros(len(displayables) + 1, dtype = np.int64)
+
+    for i, d in enumerate(displayables):
+        kinds[i] = kind_ids.setdefault(type(d), len(kind_ids))
+        options[i] = option_ids.setdefault(d.options, len(option_ids))
+        offsets[i + 1] = offsets[i] + d.coordinates.shape[0]
+    
+    # Every block needs ndims columns, including the displayables without vertices
+    coordinates = np.concatenate([np.zeros((0, fig.ndims))] + [fig._coordinates_of(d) for d in displayables])
+
+    return FigurePack(
+        ndims = fig.ndims,
+        coordinates = coordinates,
+        offsets = offsets,
+        kinds = kinds,
+        option_ids = options,
+        kind_table = [f"{cls.__module__}:{cls.__qualname__}" for cls in kind_ids],
+        options_table = [astuple(o) for o in option_ids],
+        decimals = fig.decimals,
+        projection = fig.projection,
+    )
+
+def unpack_figure(pack: FigurePack) -> Figure:
+    """Rebuilds a figure from a FigurePack. The coordinates of the displayables are read-only views into pack.coordinates, so nothing is copied"""
+    classes = [_resolve_kind(name) for name in pack.kind_table]
+    options = [PlotOptions(*row).intern() for row in pack.options_table]
+
+    coordinates = pack.coordinates.view()
+    coordinates.flags.writeable = False
+
+    fig = Figure(pack.ndims, projection = pack.projection, decimals = pack.decimals)
+    offsets = pack.offsets.tolist()
+    for i, (kind, option) in enumerate(zip(pack.kinds.tolist(), pack.option_ids.tolist())):
+        cls = classes[kind]
+        d: Displayable = cls.__new__(cls)
+        d.coordinates = coordinates[offsets[i]:offsets[i + 1]]
+        d.options = options[option]
+        fig.toDraw.append(d)
+    return fig
+
+# The file starts with the magic bytes, the format version and the length of the JSON header, followed by the header and the arrays
+MAGIC = b"TIKZPACK"
+VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+
+# Arrays start at multiples of this many bytes, so that they are aligned in memory when the file is mapped
+_ALIGNMENT = 64
+
+_ARRAYS = ("coordinates", "offsets", "kinds", "option_ids")
+
+def save_pack(pack: FigurePack, file: str | os.PathLike) -> None:
+    """Saves the FigurePack to a file in a compact binary format: a small JSON header with the kind and options tables and the projection, 
+    followed by the raw little-endian arrays. Use load_pack to read it back. 
+    Only projections made of linear and stereographic projections can be saved, other projections raise a TypeError"""
+    projection = _projection_to_json(pack.projection)
+    arrays = {name: np.ascontiguousarray(getattr(pack, name)) for name in _ARRAYS}
+    arrays = {name: arr.astype(arr.dtype.newbyteorder("<"), copy = False) for name, arr in arrays.items()}
+
+    # Lay out the arrays after the header, which is padded so that the first array is aligned as well
+    layout: dict[str, dict[str, Any]] = {}
+    position = 0
+    for name, arr in arrays.items():
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": position}
+        position += -(-arr.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    header = json.dumps({
+        "ndims": pack.ndims,
+        "decimals": pack.decimals,
+        "kind_table": pack.kind_table,
+        "options_table": [list(row) for row in pack.options_table],
+        "projection": projection,
+        "arrays": layout,
+    }).encode("utf-8")
+    header += b" " * (-(_PREAMBLE.size + len(header)) % _ALIGNMENT)
+    start = _PREAMBLE.size + len(header)
+
+    with open(file, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(start + layout[name]["offset"])
+            f.write(arr.tobytes())
+        f.truncate(start + position)
+
+def load_pack(file: str | os.PathLike, mmap: bool = True) -> FigurePack:
+    """Loads a FigurePack saved by save_pack. 
+    If mmap is true, then the arrays are read-only views into a memory map of the file, so only the parts that are used are read from disk. 
+    Otherwise the whole file is read into memory"""
+    with open(file, "rb") as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise ValueError(f"{file} is not a saved figure")
+        magic, version, header_length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f"{file} is not a saved figure")
+        if version != VERSION:
+            raise ValueError(f"{file} is saved with format version {version}, but only version {VERSION} is supported")
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    
+    start = _PREAMBLE.size + header_length
+    data = np.memmap(file, dtype = np.uint8, mode = "r") if mmap else np.fromfile(file, dtype = np.uint8)
+    
+    arrays: dict[str, NDArray] = {}
+    for name in _ARRAYS:
+        spec = header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        offset = start + spec["offset"]
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if offset + nbytes > data.shape[0]:
+            raise ValueError(f"{file} is truncated")
+        arr = data[offset:offset + nbytes].view(dtype).reshape(shape)
+        arr.flags.writeable = False
+        arrays[name] = arr
+
+    return FigurePack(
+        ndims = header["ndims"],
+        kind_table = header["kind_table"],
+        options_table = [tuple(row) for row in header["options_table"]],
+        decimals = header["decimals"],
+        projection = _projection_from_json(header.get("projection", None)),
+        **arrays,
+    )
+
+def _projection_to_json(projection: Projection | None) -> list[dict[str, Any]] | None:
+    """Describes the projection as the list of stages of its compiled pipeline"""
+    if projection is None:
+        return None
+    stages: list[dict[str, Any]] = []
+    for stage in projection.compile().stages:
+        if isinstance(stage, LinearProjection):
+            stages.append({"kind": "linear", "matrix": stage.matrix.tolist()})
+        elif isinstance(stage, StereographicProjection):
+            stages.append({"kind": "stereographic", "n": stage.n})
+        else:
+            raise TypeError(f"Only linear and stereographic projections can be saved, recieved {type(stage).__name__}")
+    return stages
+
+def _projection_from_json(stages: list[dict[str, Any]] | None) -> Projection | None:
+    if stages is None:
+        return None
+    projections: list[Projection] = []
+    for stage in stages:
+        if stage["kind"] == "linear":
+            projections.append(LinearProjection(np.array(stage["matrix"], dtype = np.float64)))
+        elif stage["kind"] == "stereographic":
+            projections.append(StereographicProjection(int(stage["n"])))
+        else:
+            raise ValueError(f"Unknown projection {stage['kind']} in the saved figure")
+    return ProjectionPipeline(*projections)
+
+def save_figure(fig: Figure, file: str | os.PathLike, kwargs: dict[str, Any] | None = None) -> None:
+    """Saves the displayables of the figure to a file, so they can be loaded without running the drawables again. 
+    Lazily drawn drawables are expanded with the render keyword arguments kwargs. See save_pack for the format"""
+    save_pack(pack_figure(fig, kwargs), file)
+
+def load_figure(file: str | os.PathLike, mmap: bool = True) -> Figure:
+    """Loads a figure saved by save_figure. If mmap is true, then the coordinates of the displayables are read-only views 
+    into a memory map of the file, so opening a large figure is instant and only the parts that are rendered are read from disk"""
+    return unpack_figure(load_pack(file, mmap))
+
+def _resolve_kind(name: str) -> type[Displayable]:
+    """Finds the displayable type from its "module:qualname" name. Only subclasses of Displayable that are already defined are found, 
+    and only modules of tikzpaint are imported to find them, so that loading a file cannot import arbitrary modules. 
+    Displayables defined elsewhere must be imported before loading"""
+    cls = _known_kinds().get(name, None)
+    if cls is None:
+        module = name.partition(":")[0]
+        if module == "tikzpaint" or module.startswith("tikzpaint."):
+            import_module(module)
+            cls = _known_kinds().get(name, None)
+    if cls is None:
+        raise ValueError(f"{name} is not a known displayable type, import the module that defines it before loading")
+    return cls
+
+def _known_kinds() -> dict[str, type[Displayable]]:
+    """All the subclasses of Displayable that are currently defined, by their "module:qualname" name"""
+    kinds: dict[str, type[Displayable]] = {}
+    stack: list[type[Displayable]] = [Displayable]
+    while stack:
+        cls = stack.pop()
+        for sub in cls.__subclasses__():
+            name = f"{sub.__module__}:{sub.__qualname__}"
+            if name not in kinds:
+                kinds[name] = sub
+                stack.append(sub)
+    return kinds
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from math import floor
+import numpy as np
+
+from tikzpaint.util import NDArray, Rect
+
+class GridIndex:
+    """A uniform grid over 2D bounding boxes, supporting range and nearest neighbour queries without scanning every item
+    
+    - cell_size: the side length of a grid cell. It should be around the size of a typical item
+    - max_cells: items covering more cells than this are kept in a separate list which is checked on every query"""
+    def __init__(self, cell_size: float = 1., max_cells: int = 64) -> None:
+        if cell_size <= 0:
+            raise ValueError(f"Cell size must be greater than 0, recieved {cell_size}")
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        self.oversized: list[int] = []
+        self._boxes = np.empty((16, 4))
+        self._count = 0
+
+        # The number of items whose bounding box can intersect a rectangle. Empty boxes, such as the ones of items without points, never do
+        self._reachable = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    @property
+    def boxes(self) -> NDArray[np.float64]:
+        """The (N, 4) array of the bounding boxes (xmin, ymin, xmax, ymax) of the items, where the i-th row belongs to item i"""
+        return self._boxes[:self._count]
+    
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return (floor(x / self.cell_size), floor(y / self.cell_size))
+    
+    def insert(self, bbox: Rect) -> int:
+        """Adds an item with the bounding box (xmin, ymin, xmax, ymax) and returns its index. Items are numbered from 0 in order of insertion"""
+        item = self._count
+        if item == self._boxes.shape[0]:
+            self._boxes = np.concatenate([self._boxes, np.empty_like(self._boxes)])
+        self._boxes[item] = bbox
+        self._count += 1
+        if bbox[0] <= bbox[2] and bbox[1] <= bbox[3]:
+            self._reachable += 1
+
+        if not np.all(np.isfinite(bbox)):
+            self.oversized.append(item)
+            return item
+
+        (x0, y0), (x1, y1) = self._cell(bbox[0], bbox[1]), self._cell(bbox[2], bbox[3])
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > self.max_cells:
+            self.oversized.append(item)
+            return item
+        
+        for i in range(x0, x1 + 1):
+            for j in range(y0, y1 + 1):
+                self.cells.setdefault((i, j), []).append(item)
+        return item
+    
+    def insert_points(self, points: NDArray[np.float64]) -> int:
+        """Adds an item covering the (N, 2) points and returns its index"""
+        if points.shape[0] == 0:
+            raise ValueError("Cannot index an item without any points")
+        (xmin, ymin), (xmax, ymax) = points.min(axis = 0), points.max(axis = 0)
+        return self.insert((float(xmin), float(ymin), float(xmax), float(ymax)))
+    
+    def query(self, rect: Rect) -> NDArray[np.intp]:
+        """Returns the sorted indices of the items whose bounding box intersects the rectangle (xmin, ymin, xmax, ymax)"""
+        xmin, ymin, xmax, ymax = rect
+        (x0, y0), (x1, y1) = self._cell(xmin, ymin), self._cell(xmax, ymax)
+
+        candidates: list[int] = list(self.oversized)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.cells):
+            # The rectangle covers more cells than there are occupied ones
+            for (i, j), items in self.cells.items():
+                if x0 <= i <= x1 and y0 <= j <= y1:
+                    candidates.extend(items)
+        else:
+            for i in range(x0, x1 + 1):
+                for j in range(y0, y1 + 1):
+                    candidates.extend(self.cells.get((i, j), ()))
+        
+        idx = np.unique(np.array(candidates, dtype = np.intp))
+        boxes = self._boxes[idx]
+        hit = (boxes[:, 2] >= xmin) & (boxes[:, 0] <= xmax) & (boxes[:, 3] >= ymin) & (boxes[:, 1] <= ymax)
+        return idx[hit]
+    
+    def nearest(self, point: tuple[float, float], k: int = 1) -> NDArray[np.intp]:
+        """Returns the indices of the k items whose bounding boxes are closest to the point, closest first. 
+        Items with empty bounding boxes are never returned, so fewer than k items are returned if there are not enough of the others"""
+        k = min(k, self._reachable)
+        if k <= 0:
+            return np.zeros(0, dtype = np.intp)
+        
+        x, y = point
+        cx, cy = self._cell(x, y)
+        radius = 0
+        while True:
+            # Every item within distance radius * cell_size of the point touches one of the cells searched so far
+            reach = radius * self.cell_size
+            idx = self.query((x - reach - self.cell_size, y - reach - self.cell_size, x + reach + self.cell_size, y + reach + self.cell_size))
+            distances = self._distances(idx, x, y)
+            found = idx[distances <= reach]
+            if len(found) >= k or len(idx) == self._reachable:
+                order = np.argsort(distances, kind = "stable")[:k]
+                return idx[order]
+            radius = max(1, radius * 2)
+    
+    def _distances(self, idx: NDArray[np.intp], x: float, y: float) -> NDArray[np.float64]:
+        boxes = self._boxes[idx]
+        dx = np.maximum(np.maximum(boxes[:, 0] - x, x - boxes[:, 2]), 0)
+        dy = np.maximum(np.maximum(boxes[:, 1] - y, y - boxes[:, 3]), 0)
+        return np.hypot(dx, dy)
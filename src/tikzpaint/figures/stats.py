@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, asdict
+from time import perf_counter
+from typing import Any, Callable
+
+from tikzpaint.figures.displayable import Displayable
+
+@dataclass
+class RenderStats:
+    """The statistics collected during one operation on an instrumented figure. See Figure.instrument
+
+    - operation: str = the operation that was measured, which is one of "draw", "tikz", "plot" and "preprocess"
+    - timings: dict[str, float] = the seconds spent in every stage, such as expand, validate, project, round, cull, clip, simplify, format and plot
+    - primitives: dict[str, int] = the number of displayables emitted per displayable type
+    - vertices: int = the total number of vertices of the emitted displayables
+    - bytes_emitted: int = the number of characters of tikz code produced
+    - copies: int = the number of coordinate arrays copied by the render pipeline
+    - cache_hits: int = the number of displayables whose tikz code was taken from the cache instead of being processed again
+    - total: float = the seconds spent in the whole operation"""
+    operation: str
+    timings: dict[str, float] = field(default_factory = dict)
+    primitives: dict[str, int] = field(default_factory = dict)
+    vertices: int = 0
+    bytes_emitted: int = 0
+    copies: int = 0
+    cache_hits: int = 0
+    total: float = 0.
+
+    def lap(self, stage: str, start: float) -> float:
+        """Adds the time since start to the stage, and returns the current time so the next stage can start from it"""
+        now = perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.) + now - start
+        return now
+
+    def emit(self, kind: type[Displayable], vertices: int, fragment: str | None = None) -> None:
+        """Counts a displayable of type kind with this many vertices that is drawn, and the tikz code it produced if any"""
+        name = kind.__name__
+        self.primitives[name] = self.primitives.get(name, 0) + 1
+        self.vertices += vertices
+        if fragment is not None:
+            self.bytes_emitted += len(fragment)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Returns the statistics as plain python objects, for example to send to a metrics system"""
+        return asdict(self)
+
+    def summary(self) -> str:
+        """Returns a human readable table of the statistics"""
+        lines = [f"{self.operation}: {self.total * 1000:.3f} ms"]
+        for stage, seconds in sorted(self.timings.items(), key = lambda x: -x[1]):
+            lines.append(f"    {stage:<12}{seconds * 1000:>10.3f} ms")
+        for name, count in sorted(self.primitives.items()):
+            lines.append(f"    {name:<12}{count:>10}")
+        lines.append(f"    {'vertices':<12}{self.vertices:>10}")
+        lines.append(f"    {'bytes':<12}{self.bytes_emitted:>10}")
+        lines.append(f"    {'copies':<12}{self.copies:>10}")
+        lines.append(f"    {'cache hits':<12}{self.cache_hits:>10}")
+        return "\n".join(lines)
+
+StatsHook = Callable[[RenderStats], Any]
@@ -2,6 +2,7 @@ from tikzpaint.shapes.arrow import Arrow
 from tikzpaint.shapes.line import Line
 from tikzpaint.shapes.vector import Vector
 from tikzpaint.shapes.point import Point
+from tikzpaint.shapes.parametric import ParametricCurve, ParametricSurface
 from tikzpaint.shapes.base import L0Arrow
 from tikzpaint.shapes.base import L0Point
 from tikzpaint.shapes.base import L0Path
\ No newline at end of file
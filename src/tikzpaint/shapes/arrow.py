@@ -0,0 +1,20 @@
+from typing import Generator, Iterable
+
+from tikzpaint.figures import Drawable, Displayable
+from tikzpaint.util import Coordinates, Number
+
+from tikzpaint.shapes.base import L0Arrow
+
+class Arrow(Drawable):
+    """Implementation of a straight arrow that could be drawn on a figure
+    
+    start: coordinates of the tail of the arrow
+    end: coordinates of the tip of the arrow"""
+    def __init__(self, start: Coordinates | Iterable[Number], end: Coordinates | Iterable[Number]):
+        self.start = Coordinates(start)
+        self.end = Coordinates(end)
+        self.start.checkLength(self.end)
+
+    def draw(self) -> Generator[Displayable, None, None]:
+        yield L0Arrow(self.start, self.end)
+        return
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from tikzpaint.figures import Displayable
+from tikzpaint.util import Coordinates, DECIMALS, format_points
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
+class L0Arrow(Displayable):
+    """Implementation of a straight arrow that could be drawn on a figure, pointing from start to end. 
+    Arrows are not paths, so the figure never clips or simplifies them, which would move the tip"""
+    __slots__ = ()
+
+    def __init__(self, start: Coordinates | Iterable[float], end: Coordinates | Iterable[float]) -> None:
+        self.coordinates = [Coordinates(start), Coordinates(end)]
+    
+    def tikzify(self, decimals: int | None = DECIMALS) -> str:
+        coords = format_points(self.coordinates[:2], decimals)
+        return f"\\draw[->, {self.tikz_options}] {coords};"
+    
+    def plot(self, ax: Axes):
+        start, end = self.coordinates[0], self.coordinates[1]
+        ax.annotate("", xy = (end[0], end[1]), xytext = (start[0], start[1]), 
+            arrowprops = dict(
+                arrowstyle = "->",
+                color = self.options.pltcolor, 
+                lw = self.options.width,
+                alpha = self.options.opacity
+            )
+        )
+        # Annotations do not count towards the data limits
+        ax.update_datalim(self.coordinates[:2, :2])
+    
+    def __copy__(self):
+        return L0Arrow(self.coordinates[0], self.coordinates[1])
@@ -1,33 +1,56 @@
-from tikzpaint.figures import Displayable
-from tikzpaint.util import Coordinates, copy
-import matplotlib.pyplot as plt
-from matplotlib.axes import Axes
-from typing import Iterable
+from __future__ import annotations
+
+from tikzpaint.figures import Displayable, PlotOptions
+from tikzpaint.util import Coordinates, NDArray, DECIMALS, format_points
+import numpy as np
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.collections import LineCollection
 
 class L0Path(Displayable):
     """Implementation of a path that could be drawn on a figure"""
-    def __init__(self, coords: list[Coordinates]) -> None:
-        for i, t in enumerate(coords):
-            self.coordinates[i] = copy(t)
-        self.lencoords = len(coords)
+    __slots__ = ()
+    is_path = True
+
+    def __init__(self, coords: list[Coordinates] | NDArray) -> None:
+        self.coordinates = coords
+    
+    @property
+    def lencoords(self) -> int:
+        return self.coordinates.shape[0]
     
     def plot(self, ax: Axes):
-        x, y = [], []
-        for i in range(self.lencoords):
-            _x, _y = self.coordinates[i]
-            x.append(_x)
-            y.append(_y)
-
-        ax.plot(x, y, ls = "-", 
+        ax.plot(self.coordinates[:, 0], self.coordinates[:, 1], ls = "-", 
             color = self.options.pltcolor, 
             lw = self.options.width,
             alpha = self.options.opacity
         )
 
-    def tikzify(self) -> str:
-        coords = " -- ".join([str(self.coordinates[i]) for i in range(self.lencoords)])
+    @classmethod
+    def plot_batch(cls, ax: Axes, displayables: list[Displayable], options: PlotOptions):
+        from matplotlib.collections import LineCollection
+
+        # One line collection for the whole group
+        lines = LineCollection([d.coordinates for d in displayables], 
+            linestyles = "-",
+            colors = options.pltcolor, 
+            linewidths = options.width,
+            alpha = options.opacity
+        )
+        ax.add_collection(lines)
+        return lines
+    
+    @classmethod
+    def update_batch(cls, artist: LineCollection, coordinates: list[NDArray[np.float64]]) -> bool:
+        artist.set_segments(coordinates)
+        return True
+
+    def tikzify(self, decimals: int | None = DECIMALS) -> str:
+        coords = format_points(self.coordinates, decimals)
         return f"\\draw[{self.tikz_options}] {coords};"
     
     def __copy__(self):
-        return L0Path([self.coordinates[i] for i in range(self.lencoords)])
-    
\ No newline at end of file
+        return L0Path(self.coordinates)
+    
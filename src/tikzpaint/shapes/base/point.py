@@ -1,20 +1,27 @@
-from tikzpaint.figures import Displayable
-from tikzpaint.util import Coordinates, copy
-import matplotlib.pyplot as plt
-from matplotlib.axes import Axes
-from typing import Any
+from __future__ import annotations
+
+from tikzpaint.figures import Displayable, PlotOptions
+from tikzpaint.util import Coordinates, NDArray, DECIMALS, format_points
+import numpy as np
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.collections import PathCollection
 
 class L0Point(Displayable):
     """Implementation of a point that could be drawn on a figure"""
+    __slots__ = ()
+
     def __init__(self, p: Coordinates):
-        self.coordinates[""] = copy(p)
+        self.coordinates = [p]
     
-    def tikzify(self):
-        p = self.coordinates[""]
+    def tikzify(self, decimals: int | None = DECIMALS):
+        p = format_points(self.coordinates[:1], decimals)
         return f"\\node[{self.tikz_options}] at {p} {{}}"
 
     def plot(self, ax: Axes):
-        x, y = self.coordinates[""]
+        x, y = self.coordinates[0]
         ax.plot(x, y, 
             marker="o", 
             markersize=self.options.width * 10, 
@@ -25,5 +32,24 @@ class L0Point(Displayable):
             alpha = self.options.opacity
         )
     
+    @classmethod
+    def plot_batch(cls, ax: Axes, displayables: list[Displayable], options: PlotOptions):
+        # One scatter for the whole group. Scatter sizes are the squares of the marker sizes
+        offsets = np.concatenate([d.coordinates for d in displayables])
+        return ax.scatter(offsets[:, 0], offsets[:, 1], 
+            marker="o", 
+            s=(options.width * 10) ** 2, 
+            c=options.pltcolor, 
+            edgecolors=options.pltcolor,
+            alpha = options.opacity
+        )
+    
+    @classmethod
+    def update_batch(cls, artist: PathCollection, coordinates: list[NDArray[np.float64]]) -> bool:
+        artist.set_offsets(np.concatenate(coordinates))
+        return True
+    
     def __copy__(self):
-        return L0Point(self.coordinates[""])
\ No newline at end of file
+        new = L0Point.__new__(L0Point)
+        new.coordinates = self.coordinates
+        return new
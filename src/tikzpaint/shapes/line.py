@@ -1,8 +1,8 @@
 from typing import Generator, Iterable
 import numpy as np
 
-from tikzpaint.figures import Drawable, Displayable
-from tikzpaint.util import Coordinates, copy, Number
+from tikzpaint.figures import Drawable, Displayable, Projection
+from tikzpaint.util import Coordinates, NDArray, copy, Number
 
 from tikzpaint.shapes.vector import Vector
 from tikzpaint.shapes.base import L0Path
@@ -12,23 +12,79 @@ class Line(Drawable):
     
     start: coordinates of the start of a line
     end: coordinates of the end of a line
-    resolution: the resolution of a line such that if we perform stereographic projections and what nots we can get a curvy line"""
-    def __init__(self, start: Coordinates | Iterable[Number], end: Coordinates | Iterable[Number], resolution: int = 100):
+    resolution: the resolution of a line such that if we perform stereographic projections and what nots we can get a curvy line
+    adaptive: if the projection is known when the line is drawn, sample the line according to the projection instead of using the resolution. 
+        Under linear projections only the endpoints are needed, and under curved projections the line is subdivided until it is accurate enough. 
+        2D figures without a projection draw the coordinates as they are, so only the endpoints are needed there as well
+    tolerance: the largest distance allowed between the projected curve and the drawn segments, in output units, when sampling adaptively
+    
+    When drawn lazily, the resolution and tolerance keyword arguments of the render override the ones of the line"""
+    # The maximum number of times a segment is halved during adaptive sampling
+    MAX_DEPTH = 16
+
+    def __init__(self, start: Coordinates | Iterable[Number], end: Coordinates | Iterable[Number], resolution: int = 100, 
+                 adaptive: bool = True, tolerance: float = 1e-3):
         self.start = Coordinates(start)
         self.end = Coordinates(end)
         if resolution < 1:
             raise ValueError(f"Resolution must be greater or equal to 1, recieved {resolution}")
+        if tolerance <= 0:
+            raise ValueError(f"Tolerance must be greater than 0, recieved {tolerance}")
         self.resolution = resolution
+        self.adaptive = adaptive
+        self.tolerance = tolerance
     
-    def gen_coords(self) -> Generator[Coordinates, None, None]:
-        for i in range(self.resolution + 1):
-            yield self.start.scale(i / self.resolution) + self.end.scale(1 - i / self.resolution)
+    def gen_coords(self, resolution: int | None = None) -> Generator[Coordinates, None, None]:
+        resolution = self.resolution if resolution is None else resolution
+        for i in range(resolution + 1):
+            yield self.start.scale(i / resolution) + self.end.scale(1 - i / resolution)
         return
+    
+    def points(self, t: NDArray) -> NDArray[np.float64]:
+        """Returns the points on the line at the parameters t, in the same direction as gen_coords, so t = 0 is the end and t = 1 is the start"""
+        start, end = np.array(self.start), np.array(self.end)
+        return end + np.outer(t, start - end)
+    
+    def adaptive_samples(self, projection: Projection, tolerance: float | None = None) -> NDArray[np.float64]:
+        """Samples the line so that the projected segments stay within the tolerance of the projected curve. 
+        Returns the (N, d) array of points before projection"""
+        tolerance = self.tolerance if tolerance is None else tolerance
+        proj = projection.compile()
+        if proj.is_linear:
+            return self.points(np.array([0., 1.]))
+        
+        # Start with a few segments so that a symmetric bend cannot hide from the midpoint test
+        t = np.linspace(0, 1, 5)
+        projected = proj.batch(self.points(t))
+        for _ in range(self.MAX_DEPTH):
+            mid = (t[:-1] + t[1:]) / 2
+            projected_mid = proj.batch(self.points(mid))
+            error = np.linalg.norm(projected_mid - (projected[:-1] + projected[1:]) / 2, axis = 1)
+            refine = error > tolerance
+            if not np.any(refine):
+                break
+
+            # Insert the midpoints of the segments that are not accurate enough
+            idx = np.nonzero(refine)[0] + 1
+            t = np.insert(t, idx, mid[refine])
+            projected = np.insert(projected, idx, projected_mid[refine], axis = 0)
+        return self.points(t)
+
+    def uniform_samples(self, resolution: int | None = None) -> NDArray[np.float64]:
+        """Returns the same points as gen_coords as an (resolution + 1, d) array"""
+        resolution = self.resolution if resolution is None else resolution
+        return self.points(np.linspace(0, 1, resolution + 1))
 
     def draw(self) -> Generator[Displayable, None, None]:
-        yield L0Path(list(self.gen_coords()))
+        yield L0Path(self.uniform_samples())
         return
     
+    def expand(self, projection: Projection | None = None, **settings) -> Generator[Displayable, None, None]:
+        if not self.adaptive or projection is None:
+            yield L0Path(self.uniform_samples(settings.get("resolution", None)))
+            return
+        yield L0Path(self.adaptive_samples(projection, settings.get("tolerance", None)))
+    
     @classmethod
     def StraightLine(cls, start: Coordinates | Iterable[Number], end: Coordinates | Iterable[Number]):
-        return cls(start, end, resolution = 1)
\ No newline at end of file
+        return cls(start, end, resolution = 1, adaptive = False)
@@ -0,0 +1,103 @@
+from typing import Callable, Generator
+import numpy as np
+
+from tikzpaint.figures import Drawable, Displayable, Projection
+from tikzpaint.util import NDArray
+
+from tikzpaint.shapes.base import L0Path
+
+def _evaluate(f: Callable[..., NDArray], name: str, *params: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Calls f once on all the parameters and returns the results as a read-only (N, d) float64 array. 
+    f can either return an (N, d) array, or a tuple of d arrays of length N, one for each coordinate"""
+    n = params[0].shape[0]
+    result = f(*params)
+    if isinstance(result, (tuple, list)):
+        result = np.stack([np.broadcast_to(np.asarray(x, dtype = np.float64), (n,)) for x in result], axis = -1)
+    else:
+        result = np.asarray(result, dtype = np.float64)
+    
+    if result.ndim != 2 or result.shape[0] != n:
+        raise ValueError(f"{name} must return an array of shape ({n}, d) or a tuple of d arrays of length {n}, recieved an array with shape {result.shape}")
+    
+    # Read-only so the paths can share slices of the array without copying
+    result = np.ascontiguousarray(result)
+    result.flags.writeable = False
+    return result
+
+class ParametricCurve(Drawable):
+    """Implementation of a parametric curve f(t) that could be drawn on a figure
+    
+    f: a vectorized function that takes an array of parameters t of shape (N,) and returns either an (N, d) array of points,
+        or a tuple of d arrays, one for each coordinate. f is called once on all the samples
+    start: the first value of the parameter t
+    end: the last value of the parameter t
+    resolution: the number of segments of the curve
+    
+    When drawn lazily, the resolution keyword argument of the render overrides the one of the curve"""
+    def __init__(self, f: Callable[[NDArray[np.float64]], NDArray], start: float, end: float, resolution: int = 100):
+        if resolution < 1:
+            raise ValueError(f"Resolution must be greater or equal to 1, recieved {resolution}")
+        self.f = f
+        self.start = float(start)
+        self.end = float(end)
+        self.resolution = resolution
+    
+    def points(self, resolution: int | None = None) -> NDArray[np.float64]:
+        """Returns the (resolution + 1, d) array of points on the curve, from f(start) to f(end)"""
+        resolution = self.resolution if resolution is None else resolution
+        return _evaluate(self.f, "f", np.linspace(self.start, self.end, resolution + 1))
+
+    def draw(self) -> Generator[Displayable, None, None]:
+        yield L0Path(self.points())
+    
+    def expand(self, projection: Projection | None = None, **settings) -> Generator[Displayable, None, None]:
+        yield L0Path(self.points(settings.get("resolution", None)))
+
+class ParametricSurface(Drawable):
+    """Implementation of a parametric surface f(u, v) that could be drawn on a figure as a wireframe of grid lines
+    
+    f: a vectorized function that takes two arrays of parameters u and v of shape (N,) and returns either an (N, d) array of points,
+        or a tuple of d arrays, one for each coordinate. f is called once on all the samples of all the grid lines
+    u_range: the (start, end) of the parameter u
+    v_range: the (start, end) of the parameter v
+    lines: the number of grid lines along u and along v. Either one number for both, or a tuple (u lines, v lines)
+    resolution: the number of segments of each grid line
+    
+    When drawn lazily, the resolution keyword argument of the render overrides the one of the surface"""
+    def __init__(self, f: Callable[[NDArray[np.float64], NDArray[np.float64]], NDArray], 
+                 u_range: tuple[float, float], v_range: tuple[float, float], lines: int | tuple[int, int] = 10, resolution: int = 100):
+        if isinstance(lines, int):
+            lines = (lines, lines)
+        if lines[0] < 2 or lines[1] < 2:
+            raise ValueError(f"The number of grid lines must be greater or equal to 2, recieved {lines}")
+        if resolution < 1:
+            raise ValueError(f"Resolution must be greater or equal to 1, recieved {resolution}")
+        self.f = f
+        self.u_range = (float(u_range[0]), float(u_range[1]))
+        self.v_range = (float(v_range[0]), float(v_range[1]))
+        self.lines = lines
+        self.resolution = resolution
+    
+    def grid_lines(self, resolution: int | None = None) -> list[NDArray[np.float64]]:
+        """Returns the points of every grid line: first the lines of constant u, then the lines of constant v. 
+        Each grid line is a read-only view into one array of all the points"""
+        resolution = self.resolution if resolution is None else resolution
+        nu, nv = self.lines
+        u_lines = np.linspace(*self.u_range, nu)
+        v_lines = np.linspace(*self.v_range, nv)
+        u_fine = np.linspace(*self.u_range, resolution + 1)
+        v_fine = np.linspace(*self.v_range, resolution + 1)
+
+        # Lines of constant u run along v and vice versa
+        u = np.concatenate([np.repeat(u_lines, resolution + 1), np.tile(u_fine, nv)])
+        v = np.concatenate([np.tile(v_fine, nu), np.repeat(v_lines, resolution + 1)])
+        points = _evaluate(self.f, "f", u, v)
+        return [points[i * (resolution + 1):(i + 1) * (resolution + 1)] for i in range(nu + nv)]
+
+    def draw(self) -> Generator[Displayable, None, None]:
+        for line in self.grid_lines():
+            yield L0Path(line)
+    
+    def expand(self, projection: Projection | None = None, **settings) -> Generator[Displayable, None, None]:
+        for line in self.grid_lines(settings.get("resolution", None)):
+            yield L0Path(line)
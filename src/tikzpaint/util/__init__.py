@@ -1,7 +1,10 @@
 from tikzpaint.util.constants import DECIMALS, EPSILON, PI
 from tikzpaint.util.constants import NDArray
-from tikzpaint.util.coordinates import Coordinates, Number
+from tikzpaint.util.coordinates import Coordinates, Number, to_array, freeze
 from tikzpaint.util.utils import copy, isInteger, isZero, isNumber
 from tikzpaint.util.utils import domain
 from tikzpaint.util.utils import num_parameters, to_subscript, to_superscript
 from tikzpaint.util.mathutils import get_orthonormal_basis, cross
+from tikzpaint.util.geometry import remove_duplicates, remove_collinear, simplify_rdp, simplify_path
+from tikzpaint.util.geometry import Rect, to_rect, clip_path, bbox_intersects
+from tikzpaint.util.formatting import round_array, format_points, format_point
@@ -3,36 +3,48 @@ from __future__ import annotations
 import numpy as np
 from abc import ABC, abstractmethod as virtual
 from typing import TypeVar, Generic, Generator, Iterator, Iterable
-from math import gcd
+from math import gcd, hypot
+from functools import cached_property
+from operator import add, sub, mul, neg
+from itertools import chain
 
 from tikzpaint.util.utils import copy, isZero
-from tikzpaint.util.constants import DECIMALS
+from tikzpaint.util.constants import DECIMALS, NDArray
 
 Number = TypeVar("Number", int, float, np.int64, np.float64, np.int32, np.integer, np.floating)
 
 class Coordinates(tuple):
     """A tuple with loads of coordinates method which serves as the base type for most stuff here"""
     def __new__(cls, it: Iterable[Number]):
-        newargs = (float(a) for a in it)
-        return super().__new__(cls, newargs)
+        if isinstance(it, np.ndarray) and it.ndim == 1:
+            # tolist converts every entry to a python number in one go
+            return super().__new__(cls, it.astype(np.float64, copy = False).tolist())
+        return super().__new__(cls, map(float, it))
+    
+    @classmethod
+    def from_array(cls, arr: NDArray) -> Coordinates:
+        """Creates the coordinates from a 1D numpy array"""
+        arr = np.asarray(arr, dtype = np.float64)
+        if arr.ndim != 1:
+            raise ValueError(f"Coordinates can only be made from a 1D array, recieved an array with shape {arr.shape} instead")
+        return tuple.__new__(cls, arr.tolist())
     
     def __iter__(self) -> Iterator[float]:
         return super().__iter__()
     
-    @property
+    @cached_property
     def magnitude(self) -> float:
-        """The magnitude of the coordinates from the origin under Euclidean distance"""
-        res: float = 0
-        for x in self:
-            res += float(x) * float(x)
-        return np.sqrt(res)
+        """The magnitude of the coordinates from the origin under Euclidean distance. 
+        Coordinates are immutable so this is only computed once"""
+        return hypot(*self)
         
     def normalized(self) -> Coordinates:
         """Returns the point on the unit ball thats one unit length away from the origin but in the same direction as usual
         If the magnitude of the vector is 0 then returns the zero vector"""
-        if isZero(self.magnitude, strict=True):
-            return Coordinates(0 for _ in self)
-        return Coordinates(float(x / self.magnitude) for x in self)
+        magnitude = self.magnitude
+        if isZero(magnitude, strict=True):
+            return _make([0.] * len(self))
+        return _make([x / magnitude for x in self])
     
     @property
     def n(self):
@@ -41,11 +53,14 @@ class Coordinates(tuple):
     
     def scale(self, factor: Number)  -> Coordinates:
         """Creates a new copy that is a scaled vector with respect to the origin"""
-        return Coordinates(float(x * factor) if self.magnitude > 0 else 0 for x in self)
+        if not self.magnitude > 0:
+            return _make([0.] * len(self))
+        factor = float(factor)
+        return _make([x * factor for x in self])
     
     def checkLength(self, other: Coordinates):
         """Raises and error if self and other has different length"""
-        if not self.n == other.n:
+        if len(self) != len(other):
             raise ValueError("The two vectors are of different length")
 
     @property
@@ -55,25 +70,29 @@ class Coordinates(tuple):
 
     def __add__(self, other: Coordinates) -> Coordinates:
         self.checkLength(other)
-        return Coordinates(float(self[i] + other[i]) for i in range(self.n))
+        return _make(map(add, self, other))
     
     def __sub__(self, other: Coordinates) -> Coordinates:
         self.checkLength(other)
-        return Coordinates(float(self[i] - other[i]) for i in range(self.n))
+        return _make(map(sub, self, other))
     
     def __rmul__(self, other: Number):
         return self.scale(other)
     
     def __neg__(self) -> Coordinates:
-        return Coordinates(float(-self[i]) for i in range(self.n))
+        return _make(map(neg, self))
     
     def __eq__(self, other: Coordinates):
         self.checkLength(other)
-        return np.allclose(np.array(self), np.array(other))
+        # Same tolerances as np.allclose
+        for x, y in zip(self, other):
+            if not (x == y or abs(x - y) <= 1e-8 + 1e-5 * abs(y)):
+                return False
+        return True
     
     def dot(self, other: Coordinates) -> float:
         self.checkLength(other)
-        return float(np.dot(np.array(self), np.array(other)))
+        return float(sum(map(mul, self, other)))
     
     def project(self, target: Coordinates):
         self.checkLength(target)
@@ -96,3 +115,33 @@ class Coordinates(tuple):
     @classmethod
     def origin(cls, ambient_dims: int):
         return Coordinates(0 for _ in range(ambient_dims))
+
+
+def _make(it: Iterable[float]) -> Coordinates:
+    """Creates coordinates from floats, skipping the conversion in Coordinates.__new__"""
+    return tuple.__new__(Coordinates, it)
+
+def freeze(coords: Iterable[Coordinates] | NDArray) -> NDArray[np.float64]:
+    """Returns a read-only (N, d) float64 array of the coordinates. Arrays that are already read-only are shared instead of copied"""
+    if isinstance(coords, np.ndarray) and coords.dtype == np.float64 and coords.ndim == 2 and not coords.flags.writeable:
+        return coords
+    arr = to_array(coords)
+    arr.flags.writeable = False
+    return arr
+
+def to_array(coords: Iterable[Coordinates] | NDArray) -> NDArray[np.float64]:
+    """Packs a sequence of coordinates into one contiguous (N, d) float64 array. This always makes a new array"""
+    if isinstance(coords, (list, tuple)) and len(coords) > 0 and isinstance(coords[0], tuple):
+        # Reading the numbers of the tuples one after another is much faster than letting numpy inspect every tuple
+        lengths = set(map(len, coords))
+        if len(lengths) != 1:
+            raise ValueError(f"Coordinates must all have the same number of dimensions, recieved coordinates with {sorted(lengths)} dimensions instead")
+        d = lengths.pop()
+        if d > 0:
+            return np.fromiter(chain.from_iterable(coords), dtype = np.float64, count = len(coords) * d).reshape(len(coords), d)
+    arr = np.array(coords, dtype = np.float64)
+    if arr.size == 0:
+        return arr.reshape(0, 0)
+    if arr.ndim != 2:
+        raise ValueError(f"Coordinates must pack into an array of shape (N, d), recieved an array with shape {arr.shape} instead")
+    return arr
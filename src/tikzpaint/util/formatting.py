@@ -0,0 +1,41 @@
+import re
+import numpy as np
+from functools import lru_cache
+from tikzpaint.util.constants import NDArray, DECIMALS
+
+# Matches the trailing zeros of a number written with a fixed number of decimal places, together with the decimal point if nothing is left after it
+_TRAILING_ZEROS = re.compile(r"\.?0+(?=[,)])")
+
+# Matches the ".0" that python writes after whole numbers
+_WHOLE = re.compile(r"\.0(?=[,)])")
+
+# Matches numbers that became negative zeros after removing their decimals
+_NEGATIVE_ZERO = re.compile(r"-0(?=[,)])")
+
+def round_array(arr: NDArray[np.float64], decimals: int = DECIMALS) -> NDArray[np.float64]:
+    """Rounds the whole array at once. Negative zeros are turned into zeros so they are not written as -0"""
+    return np.round(arr, decimals) + 0.
+
+@lru_cache(maxsize = 64)
+def _point_format(ndims: int, decimals: int | None) -> str:
+    spec = "%r" if decimals is None else f"%.{decimals}f"
+    return "(" + ", ".join([spec] * ndims) + ")"
+
+def format_points(points: NDArray[np.float64], decimals: int | None = DECIMALS, separator: str = " -- ") -> str:
+    """Writes the (N, d) points as tikz coordinates "(x, y)" joined by the separator, all in one go. 
+    Numbers are written with the given number of decimal places with the trailing zeros removed, 
+    or with python's shortest representation if decimals is None"""
+    n, ndims = points.shape
+    if n == 0:
+        return ""
+    template = separator.join([_point_format(ndims, decimals)] * n)
+    st = template % tuple(points.ravel().tolist())
+    if decimals is None:
+        st = _WHOLE.sub("", st)
+    elif decimals > 0:
+        st = _TRAILING_ZEROS.sub("", st)
+    return _NEGATIVE_ZERO.sub("0", st)
+
+def format_point(point: NDArray[np.float64], decimals: int | None = DECIMALS) -> str:
+    """Writes one point as a tikz coordinate "(x, y)". See format_points"""
+    return format_points(np.asarray(point, dtype = np.float64).reshape(1, -1), decimals)
@@ -0,0 +1,152 @@
+import numpy as np
+from typing import TypeAlias
+from tikzpaint.util.constants import NDArray
+
+# A rectangle (xmin, ymin, xmax, ymax)
+Rect: TypeAlias = tuple[float, float, float, float]
+
+def remove_duplicates(path: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Removes the vertices of the (N, d) path that are exactly the same as the vertex before them"""
+    if path.shape[0] < 2:
+        return path
+    keep = np.ones(path.shape[0], dtype = bool)
+    keep[1:] = np.any(path[1:] != path[:-1], axis = 1)
+    return path[keep]
+
+def remove_collinear(path: NDArray[np.float64], decimals: int | None = None) -> NDArray[np.float64]:
+    """Removes the vertices of the (N, 2) path that lie exactly on the straight segment between their neighbours, so the drawing does not change. 
+    If decimals is given, the path is taken to be rounded to this many decimal places and the test is done on the integer grid, 
+    which is exact regardless of floating point errors in the rounded values. 
+    Vertices where the path turns back on itself are kept, since removing them would change the drawing"""
+    if path.shape[0] < 3:
+        return path
+    
+    # Nearly collinear vertices are kept on purpose: a fine curve bends a tiny bit at every vertex, and dropping all of them would flatten it
+    grid = path if decimals is None else np.rint(path * 10. ** decimals)
+    before = grid[1:-1] - grid[:-2]
+    after = grid[2:] - grid[1:-1]
+    cross = before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]
+    dot = np.sum(before * after, axis = 1)
+    keep = np.ones(path.shape[0], dtype = bool)
+    # A positive dot product also keeps the vertices next to a duplicate, which have no direction to compare with
+    keep[1:-1] = ~((cross == 0) & (dot > 0))
+    return path[keep]
+
+def simplify_rdp(path: NDArray[np.float64], tolerance: float) -> NDArray[np.float64]:
+    """Simplifies the (N, d) path with the Ramer-Douglas-Peucker algorithm, 
+    keeping only the vertices needed so that no removed vertex is further than tolerance from the simplified path"""
+    n = path.shape[0]
+    if n < 3:
+        return path
+    
+    keep = np.zeros(n, dtype = bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = path[start], path[end]
+        inner = path[start + 1:end]
+        distances = _distance_to_segment(inner, a, b)
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            mid = start + 1 + i
+            keep[mid] = True
+            stack.append((start, mid))
+            stack.append((mid, end))
+    return path[keep]
+
+def _distance_to_segment(points: NDArray[np.float64], a: NDArray[np.float64], b: NDArray[np.float64]) -> NDArray[np.float64]:
+    """The distances between every point and the segment ab"""
+    ab = b - a
+    length = ab @ ab
+    if length == 0:
+        return np.linalg.norm(points - a, axis = 1)
+    t = np.clip((points - a) @ ab / length, 0, 1)
+    return np.linalg.norm(points - (a + np.outer(t, ab)), axis = 1)
+
+def simplify_path(path: NDArray[np.float64], tolerance: float = 0, decimals: int | None = None) -> NDArray[np.float64]:
+    """Removes duplicate and collinear vertices from the path, then simplifies it with Ramer-Douglas-Peucker if tolerance is positive. 
+    decimals is the number of decimal places the path is rounded to, if it is rounded. See remove_collinear"""
+    path = remove_duplicates(path)
+    if path.shape[1] == 2:
+        path = remove_collinear(path, decimals)
+    if tolerance > 0:
+        path = simplify_rdp(path, tolerance)
+    return path
+
+def to_rect(bound: float | tuple[float, float, float, float]) -> Rect:
+    """Turns a bound into a rectangle. A single number a denotes the square (-a, a) on both x and y axis"""
+    if isinstance(bound, tuple | list):
+        if len(bound) != 4:
+            raise ValueError(f"A rectangle must be given as (xmin, ymin, xmax, ymax), recieved {bound}")
+        xmin, ymin, xmax, ymax = (float(x) for x in bound)
+    else:
+        xmin, ymin, xmax, ymax = -float(bound), -float(bound), float(bound), float(bound)
+    if xmin > xmax or ymin > ymax:
+        raise ValueError(f"The rectangle ({xmin}, {ymin}, {xmax}, {ymax}) is empty")
+    return (xmin, ymin, xmax, ymax)
+
+def bbox_intersects(coords: NDArray[np.float64], offsets: NDArray[np.int64], rect: Rect) -> NDArray[np.bool_]:
+    """Given the (V, 2) vertices of many displayables laid out one after another, where the i-th displayable owns coords[offsets[i]:offsets[i + 1]],
+    returns whether the bounding box of every displayable intersects the rectangle. Displayables without vertices count as visible"""
+    offsets = np.asarray(offsets)
+    result = np.ones(len(offsets) - 1, dtype = bool)
+    nonempty = offsets[1:] > offsets[:-1]
+    if not np.any(nonempty):
+        return result
+    starts = offsets[:-1][nonempty]
+    lo = np.minimum.reduceat(coords, starts, axis = 0)
+    hi = np.maximum.reduceat(coords, starts, axis = 0)
+
+    # reduceat runs to the next start, so the last nonempty displayable must not run into the trailing empty ones
+    last = offsets[1:][nonempty][-1]
+    if last < coords.shape[0]:
+        lo[-1] = coords[starts[-1]:last].min(axis = 0)
+        hi[-1] = coords[starts[-1]:last].max(axis = 0)
+
+    xmin, ymin, xmax, ymax = rect
+    result[nonempty] = (hi[:, 0] >= xmin) & (lo[:, 0] <= xmax) & (hi[:, 1] >= ymin) & (lo[:, 1] <= ymax)
+    return result
+
+def clip_path(path: NDArray[np.float64], rect: Rect) -> list[NDArray[np.float64]]:
+    """Clips the (N, 2) path to the rectangle with the Liang-Barsky algorithm, vectorized over all the segments of the path. 
+    Returns the pieces of the path inside the rectangle, since a path that leaves and reenters the rectangle is split in several pieces. 
+    Segments that only touch the boundary would leave repeated vertices behind, so these are removed, and pieces that shrink to a single point are dropped"""
+    xmin, ymin, xmax, ymax = rect
+    if path.shape[0] < 2:
+        inside = path.shape[0] == 1 and xmin <= path[0, 0] <= xmax and ymin <= path[0, 1] <= ymax
+        return [path] if inside else []
+    
+    start = path[:-1]
+    delta = path[1:] - start
+
+    # For every segment and every edge, the segment enters or leaves the rectangle at t = q / p
+    p = np.stack([-delta[:, 0], delta[:, 0], -delta[:, 1], delta[:, 1]], axis = 1)
+    q = np.stack([start[:, 0] - xmin, xmax - start[:, 0], start[:, 1] - ymin, ymax - start[:, 1]], axis = 1)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        ratio = q / p
+    t0 = np.max(np.where(p < 0, ratio, 0), axis = 1)
+    t1 = np.min(np.where(p > 0, ratio, 1), axis = 1)
+    visible = (t0 <= t1) & ~np.any((p == 0) & (q < 0), axis = 1)
+
+    idx = np.nonzero(visible)[0]
+    if len(idx) == 0:
+        return []
+    
+    t0, t1 = t0[idx], t1[idx]
+    a = start[idx] + t0[:, None] * delta[idx]
+    b = start[idx] + t1[:, None] * delta[idx]
+
+    # A new piece starts unless the previous visible segment is its direct predecessor and the path stays inside in between
+    starts = np.ones(len(idx), dtype = bool)
+    starts[1:] = ~((idx[1:] == idx[:-1] + 1) & (t1[:-1] == 1) & (t0[1:] == 0))
+
+    # Every segment contributes its end point, and the first segment of every piece also contributes its start point
+    end_pos = np.arange(len(idx)) + np.cumsum(starts)
+    out = np.empty((len(idx) + int(np.sum(starts)), 2))
+    out[end_pos] = b
+    out[end_pos[starts] - 1] = a[starts]
+    pieces = [remove_duplicates(piece) for piece in np.split(out, (end_pos[starts] - 1)[1:])]
+    return [piece for piece in pieces if piece.shape[0] > 1]
@@ -60,15 +60,14 @@ def copy(obj: _copyable) -> _copyable:
     if isinstance(obj, np.ndarray):
         return np.array(obj, dtype = obj.dtype)
     
-    if "__copy__" in dir(obj) and "options" in dir(obj):
-        newobj = obj.__copy__() #type: ignore
-        newobj._options = copy(obj.options) #type: ignore
-        return newobj
-    
-    if "__copy__" in dir(obj):
-        return obj.__copy__() #type: ignore
+    copier = getattr(obj, "__copy__", None)
+    if copier is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not copyable!")
     
-    raise TypeError(f"Object of type {type(obj).__name__} is not copyable!")
+    newobj = copier()
+    if hasattr(obj, "options"):
+        newobj._options = copy(obj.options) #type: ignore
+    return newobj
 
 
 def num_parameters(f: Callable):
@@ -89,7 +88,8 @@ def notFalse(kwargs: dict[Any, Any], kw: Any):
     return not kw in kwargs or kwargs[kw]
 
 def domain(start: float, end: float, res: int, include_end: bool = False):
+    """Yields res evenly spaced numbers from start towards end, and also end itself if include_end is true"""
     r = res + 1 if include_end else res
     for i in range(r):
-        yield start * i / res + end * (1 - i / res)
+        yield start * (1 - i / res) + end * i / res
     return
\ No newline at end of file